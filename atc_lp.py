@@ -0,0 +1,62 @@
+"""Linear-programming bound on the ATCs of the flow-based domain.
+
+The LP optimum is a corner of the domain, not an ATC of the Core
+methodology: it may give one border everything and its neighbours 0.
+Use it as a diagnostic, e.g. lp_bound against the sum of the iterative
+ATCs in bench.py, never as published ATCs.
+"""
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import csr_matrix, hstack, vstack
+
+from atc_numpy import as_matrices
+
+
+def lp_atc(RAM_0, PTDF_0, max_atc=0, objective="sum"):
+    """Return an optimal corner of the positive-RAM flow-based domain, solved with HiGHS.
+
+    The LP keeps every CNEC within its margin, pPTDF @ ATC <= max(RAM, 0),
+    with 0 <= ATC <= max_atc. objective="sum" maximises the sum of ATCs,
+    objective="maxmin" the lowest ATC with the sum as a lower weighted
+    secondary goal. Borders that no CNEC constrains get max_atc, or 0 when
+    there is no cap, as in the iterative engines.
+    """
+    ram, ptdf = as_matrices(RAM_0, PTDF_0)
+    n_border = ptdf.shape[1]
+
+    positive_ptdf = np.maximum(ptdf, 0)
+    rows = positive_ptdf.any(axis=1)
+    constraints = csr_matrix(positive_ptdf[rows])
+    margins = np.maximum(ram[rows], 0)
+    constrained = positive_ptdf.any(axis=0)
+
+    upper = max_atc if max_atc != 0 else None
+    bounds = [(0, upper) if constrained[j] else (max_atc, max_atc) for j in range(n_border)]
+
+    if objective == "sum":
+        cost = -np.ones(n_border)
+    elif objective == "maxmin":
+        # Extra variable t <= ATC of every constrained border, weighted above the sum
+        cost = np.append(-np.ones(n_border), -n_border * (n_border + 1))
+        floor = csr_matrix(np.hstack([-np.eye(n_border)[constrained], np.ones((constrained.sum(), 1))]))
+        constraints = vstack([hstack([constraints, csr_matrix((constraints.shape[0], 1))]), floor]).tocsr()
+        margins = np.append(margins, np.zeros(constrained.sum()))
+        bounds.append((0, upper))
+    else:
+        raise ValueError(f"Unknown LP objective: {objective}")
+
+    result = linprog(cost, A_ub=constraints, b_ub=margins, bounds=bounds, method="highs")
+    if result.status != 0:
+        raise RuntimeError(f"ATC linear program failed: {result.message}")
+
+    return result.x[:n_border]
+
+
+def lp_bound(RAM_0, PTDF_0, max_atc=0):
+    """Return the largest ATC sum reachable in the positive-RAM domain.
+
+    The iterative ATCs stay inside the same domain, so their sum never
+    exceeds this bound.
+    """
+    return float(lp_atc(RAM_0, PTDF_0, max_atc).sum())
+
@@ -0,0 +1,113 @@
+"""Optional Numba kernel for the ATC fixed-point iteration.
+
+Each iteration is one pass over the positive PTDFs: the CNEC flow, the
+clipped remaining margin and the per-border minimum are computed row by
+row into preallocated arrays, so large MTUs allocate nothing per
+iteration. The kernel keeps the limiting CNEC per border and its
+iteration count, so a trace gets one summary record instead of one per
+iteration. Without Numba installed the NumPy engine is used instead.
+"""
+import logging
+
+import numpy as np
+
+import atc_numpy
+from atc_trace import PhaseTimer
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+
+def _iterate(indptr, columns, inv_ptdf, ptdf, max_ram, constrained, atc, atc_min, limiting, max_atc, threshold):
+    """Iterate in place on atc until the ATC sum changes by at most threshold.
+
+    limiting receives the limiting CNEC row per border of the last
+    iteration, -1 where none. Returns the iteration count and the last
+    ATC change.
+    """
+    iterations = 0
+    difference = threshold + 1.0
+    while difference > threshold:
+        atc_min[:] = np.inf
+        limiting[:] = -1
+        for i in range(len(max_ram)):
+            start = indptr[i]
+            end = indptr[i + 1]
+            if start == end:
+                continue
+
+            # Remaining margin after the ATCs of the previous iteration
+            flow = 0.0
+            for k in range(start, end):
+                flow += ptdf[k] * atc[columns[k]]
+            share = max(max_ram[i] - flow, 0.0) / (end - start)
+
+            # Share the margin equally and take the minimum exchange per border
+            for k in range(start, end):
+                ratio = share * inv_ptdf[k]
+                if ratio < atc_min[columns[k]]:
+                    atc_min[columns[k]] = ratio
+                    limiting[columns[k]] = i
+
+        # No CNEC constrains unconstrained borders, only the cap applies
+        difference = 0.0
+        for j in range(len(atc)):
+            if constrained[j]:
+                limited = atc[j] + atc_min[j]
+            elif max_atc != 0:
+                limited = max_atc
+            else:
+                limited = atc[j]
+            if max_atc != 0 and limited > max_atc:
+                limited = max_atc
+            difference += limited - atc[j]
+            atc[j] = limited
+        iterations += 1
+    return iterations, difference
+
+
+if numba is not None:
+    _iterate = numba.njit(cache=True, nogil=True)(_iterate)
+
+
+def solve_atc_numba(RAM_0, PTDF_0, max_atc=0, threshold=0.001, negative_atc=None, trace=None):
+    """Run the ATC fixed-point iteration with the fused Numba kernel.
+
+    trace, if given, receives a single record numbered with the iteration
+    count, holding the last ATC change and the limiting CNEC per border.
+    Falls back to atc_numpy.solve_atc when Numba is not installed.
+    """
+    if numba is None:
+        logger.warning("Numba is not installed, using the NumPy engine")
+        return atc_numpy.solve_atc(RAM_0, PTDF_0, max_atc, threshold, negative_atc, trace)
+
+    timer = PhaseTimer() if trace else None
+
+    ram, ptdf = atc_numpy.as_matrices(RAM_0, PTDF_0)
+    # Positive PTDFs in CSR order, so every iteration only reads the nonzeros
+    rows, columns = np.nonzero(ptdf > 0)
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(ram)))))
+    values = ptdf[rows, columns]
+    constrained = np.bincount(columns, minlength=ptdf.shape[1]) > 0
+
+    atc = np.zeros(ptdf.shape[1])
+    atc_min = np.empty(ptdf.shape[1])
+    limiting = np.full(ptdf.shape[1], -1, dtype=np.int64)
+    iterations, difference = _iterate(indptr, columns, 1.0 / values, values, np.maximum(ram, 0), constrained, atc,
+                                      atc_min, limiting, float(max_atc), float(threshold))
+    if timer:
+        timer.lap("kernel")
+        trace({
+            "iteration": iterations,
+            "seconds": timer.seconds,
+            "atc_change": float(difference),
+            "limiting_cnec": limiting.tolist(),
+        })
+
+    if negative_atc is not None:
+        atc = np.minimum(atc, negative_atc)
+    return atc
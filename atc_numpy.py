@@ -0,0 +1,364 @@
+import numpy as np
+
+from atc_trace import PhaseTimer
+
+# Define constants and configurations
+REGIME_ITERATIONS = 2  # iterations with unchanged limiting CNECs before extrapolating
+MIN_RATE = 0.5  # only extrapolate when the ATC change shrinks slower than this per iteration
+MAX_DOUBLINGS = 30  # regime checks at 1, 2, 4, ... further iterations
+
+
+def as_matrices(RAM_0, PTDF_0):
+    """Convert RAM and PTDF lists into a float64 vector and (n_cnec, n_border) matrix."""
+    ram = np.asarray(RAM_0, dtype=np.float64)
+    ptdf = np.asarray(PTDF_0, dtype=np.float64)
+    if ptdf.ndim != 2:
+        ptdf = ptdf.reshape(len(ram), -1)
+    return ram, ptdf
+
+
+def negative_atc(ram, ptdf, min_ptdf=0):
+    """Return the starting ATC per border implied by the negative-RAM CNECs of one MTU.
+
+    Borders that no negative-RAM CNEC constrains get +inf. Positive PTDFs
+    below min_ptdf count as zero.
+    """
+    ram, ptdf = as_matrices(ram, ptdf)
+    negative = ram < 0
+    ram = ram[negative]
+    positive_ptdf = np.maximum(ptdf[negative], 0)
+    if min_ptdf:
+        positive_ptdf[positive_ptdf < min_ptdf] = 0
+
+    # Step 1: denominators, the sum of squared positive PTDFs per CNEC
+    denominator = (positive_ptdf ** 2).sum(axis=1)
+
+    # Step 2: candidate ATC per CNEC and border, the most negative one per border
+    scale = np.divide(ram, denominator, out=np.zeros_like(denominator), where=denominator > 0)
+    candidates = np.where(positive_ptdf > 0, positive_ptdf * scale[:, None], np.inf)
+    atc = candidates.min(axis=0, initial=np.inf)
+
+    # Step 3: scaling factor per CNEC, the final one is the maximum
+    limited = np.isfinite(atc)
+    sf_denominator = positive_ptdf @ np.where(limited, atc, 0)
+    sf = np.divide(np.abs(ram), np.abs(sf_denominator), out=np.full_like(ram, -np.inf), where=sf_denominator != 0)
+    final_sf = sf.max(initial=-np.inf)
+
+    # Step 4: scale the negative ATCs, unless no CNEC gave a scaling factor
+    if not np.isfinite(final_sf):
+        return atc
+    return np.where(limited, atc * final_sf, atc)
+
+
+def negative_limiting(ram, ptdf, min_ptdf=0):
+    """Return the row of the negative-RAM CNEC that sets negative_atc per border, -1 where none does.
+
+    All negative ATCs are scaled by the same factor, so the CNEC with the
+    most negative candidate of step 2 is the one behind the final value.
+    """
+    ram, ptdf = as_matrices(ram, ptdf)
+    rows = np.flatnonzero(ram < 0)
+    if not len(rows):
+        return np.full(ptdf.shape[1], -1)
+    positive_ptdf = np.maximum(ptdf[rows], 0)
+    if min_ptdf:
+        positive_ptdf[positive_ptdf < min_ptdf] = 0
+    denominator = (positive_ptdf ** 2).sum(axis=1)
+    scale = np.divide(ram[rows], denominator, out=np.zeros_like(denominator), where=denominator > 0)
+    candidates = np.where(positive_ptdf > 0, positive_ptdf * scale[:, None], np.inf)
+    return np.where(np.isfinite(candidates.min(axis=0)), rows[candidates.argmin(axis=0)], -1)
+
+
+def iterate_atc(ram, ptdf, atc, flow, max_atc=0, threshold=0.001, trace=None):
+    """Run the ATC fixed-point iteration from a given ATC vector.
+
+    flow is the positive-PTDF loading of every CNEC under atc, i.e.
+    max(ptdf, 0) @ atc. Returns the converged ATCs, their flows and the
+    number of iterations. trace, if given, is called with one record per
+    iteration (see atc_trace.AtcTrace).
+    """
+    n_border = ptdf.shape[1]
+
+    # Positive zone-to-zone PTDFs and the number of borders sharing each CNEC
+    positive_ptdf = np.maximum(ptdf, 0)
+    positive = positive_ptdf > 0
+    positive_count = positive.sum(axis=1)
+    inv_ptdf = np.divide(1.0, positive_ptdf, out=np.zeros_like(positive_ptdf), where=positive)
+    max_ram = np.maximum(ram, 0)
+    constrained = positive.any(axis=0)
+
+    iterations = 0
+    difference = 1
+    while difference > threshold:
+        timer = PhaseTimer() if trace else None
+
+        # Remaining margin after the ATCs of the previous iteration
+        ram_ini = np.maximum(max_ram - flow, 0)
+        if timer:
+            timer.lap("ram_update")
+
+        # Share the margin equally and take the minimum exchange per border
+        share = np.divide(ram_ini, positive_count, out=np.zeros_like(ram_ini), where=positive_count > 0)
+        atc_2d = np.where(positive, share[:, None] * inv_ptdf, np.inf)
+        atc_min = atc_2d.min(axis=0) if len(ram) else np.full(n_border, np.inf)
+        if timer:
+            timer.lap("border_min")
+
+        # No CNEC constrains these borders, only the cap applies
+        added_atc = np.where(constrained, atc + atc_min, max_atc if max_atc != 0 else atc)
+        limited_atc = np.minimum(added_atc, max_atc) if max_atc != 0 else added_atc
+        if timer:
+            timer.lap("clipping")
+
+        difference = limited_atc.sum() - atc.sum()
+        atc = limited_atc
+        flow = positive_ptdf @ atc
+        iterations += 1
+
+        if trace:
+            limiting = atc_2d.argmin(axis=0) if len(ram) else np.zeros(n_border, dtype=int)
+            trace({
+                "iteration": iterations,
+                "seconds": timer.seconds,
+                "atc_change": float(difference),
+                "limiting_cnec": np.where(constrained, limiting, -1).tolist(),
+            })
+
+    return atc, flow, iterations
+
+
+def extrapolate_regime(atc, limiting, border_ratios, max_ram, positive_ptdf, max_atc=0, threshold=0.001):
+    """Return the ATCs the iteration reaches if the limiting CNECs stay the same, or None.
+
+    While every constrained border keeps its limiting CNEC, the iteration
+    is linear in the remaining margins m of those CNECs: border j adds
+    m_l / (n_l * p_lj) and the margins shrink to A @ m. The limit is then
+    atc + B (I - A)^-1 m in closed form. The regime is checked after 1, 2,
+    4, ... further iterations: every CNEC must stay within its margin and
+    the limiting CNECs must remain the minimum of their borders, both
+    within threshold. border_ratios(flow) returns the (n_cnec, n_border)
+    share / pPTDF matrix of the iteration, np.inf where a PTDF is not
+    positive. limiting is -1 for unconstrained borders.
+    """
+    columns = np.flatnonzero(limiting >= 0)
+    rows, row_of = np.unique(limiting[columns], return_inverse=True)
+    positive_count = (positive_ptdf[rows] > 0).sum(axis=1)
+
+    step = np.zeros((len(atc), len(rows)))
+    step[columns, row_of] = 1.0 / (positive_count[row_of] * positive_ptdf[rows[row_of], columns])
+    transition = np.eye(len(rows)) - positive_ptdf[rows] @ step
+    margin = np.maximum(max_ram - positive_ptdf @ atc, 0)[rows]
+    try:
+        resolvent = np.linalg.inv(np.eye(len(rows)) - transition)
+    except np.linalg.LinAlgError:
+        return None
+
+    power = transition
+    for _ in range(MAX_DOUBLINGS):
+        added = step @ (resolvent @ (margin - power @ margin))
+        candidate = atc + added
+        flow = positive_ptdf @ candidate
+        if (added < -threshold).any() or (flow > max_ram + threshold).any():
+            return None
+        if max_atc != 0 and (candidate > max_atc).any():
+            return None
+        ratios = border_ratios(flow)
+        if (ratios[limiting[columns], columns] > ratios[:, columns].min(axis=0) + threshold).any():
+            return None
+        if (step @ (resolvent @ (power @ margin))).sum() <= threshold:
+            return atc + step @ (resolvent @ margin)
+        power = power @ power
+    return None
+
+
+def iterate_atc_accelerated(ram, ptdf, atc, flow, max_atc=0, threshold=0.001, trace=None):
+    """Run the ATC fixed-point iteration with regime extrapolation.
+
+    Same contract as iterate_atc. Once the limiting CNECs have not changed
+    for REGIME_ITERATIONS iterations and the ATC change shrinks slowly,
+    the iteration jumps to the limit of that regime (see
+    extrapolate_regime). A rejected jump leaves the plain iteration
+    untouched. Convergence is per border: every border's remaining
+    increase, estimated from the rate at which its own steps shrink, must
+    be at most threshold.
+    """
+    n_border = ptdf.shape[1]
+
+    positive_ptdf = np.maximum(ptdf, 0)
+    positive = positive_ptdf > 0
+    positive_count = positive.sum(axis=1)
+    inv_ptdf = np.divide(1.0, positive_ptdf, out=np.zeros_like(positive_ptdf), where=positive)
+    max_ram = np.maximum(ram, 0)
+    constrained = positive.any(axis=0)
+
+    def border_ratios(flow):
+        ram_ini = np.maximum(max_ram - flow, 0)
+        share = np.divide(ram_ini, positive_count, out=np.zeros_like(ram_ini), where=positive_count > 0)
+        return np.where(positive, share[:, None] * inv_ptdf, np.inf)
+
+    iterations = 0
+    regime_iterations = 0
+    previous_step = np.zeros(n_border)
+    previous_limiting = rejected = None
+    while True:
+        timer = PhaseTimer() if trace else None
+
+        atc_2d = border_ratios(flow)
+        limiting = np.where(constrained, atc_2d.argmin(axis=0), -1) if len(ram) else np.full(n_border, -1)
+        atc_min = atc_2d.min(axis=0) if len(ram) else np.full(n_border, np.inf)
+        if timer:
+            timer.lap("border_min")
+
+        # No CNEC constrains these borders, only the cap applies
+        added_atc = np.where(constrained, atc + atc_min, max_atc if max_atc != 0 else atc)
+        limited_atc = np.minimum(added_atc, max_atc) if max_atc != 0 else added_atc
+        step = limited_atc - atc
+        atc = limited_atc
+        flow = positive_ptdf @ atc
+        iterations += 1
+
+        # Remaining increase per border if its steps keep shrinking at their current rate
+        rate = np.divide(step, previous_step, out=np.zeros(n_border), where=previous_step > 0)
+        geometric = (rate > 0) & (rate < 1)
+        remaining = np.where(geometric, step * rate / np.where(geometric, 1 - rate, 1), step)
+        converged = (remaining <= threshold).all()
+        slow = step.sum() > MIN_RATE * previous_step.sum() > 0
+        previous_step = step
+        if timer:
+            timer.lap("clipping")
+
+        extrapolated = False
+        regime_iterations = regime_iterations + 1 if np.array_equal(limiting, previous_limiting) else 0
+        previous_limiting = limiting
+        if not converged and slow and regime_iterations >= REGIME_ITERATIONS and not np.array_equal(limiting, rejected):
+            limit = extrapolate_regime(atc, limiting, border_ratios, max_ram, positive_ptdf, max_atc, threshold)
+            if limit is None:
+                rejected = limiting
+            else:
+                atc = limit
+                flow = positive_ptdf @ atc
+                extrapolated = True
+            if timer:
+                timer.lap("extrapolation")
+
+        if trace:
+            trace({
+                "iteration": iterations,
+                "seconds": timer.seconds,
+                "atc_change": float(step.sum()),
+                "limiting_cnec": limiting.tolist(),
+                "extrapolated": extrapolated,
+            })
+        if converged:
+            return atc, flow, iterations
+
+
+def solve_atc(RAM_0, PTDF_0, max_atc=0, threshold=0.001, negative_atc=None, trace=None, accelerate=False):
+    """Run the ATC fixed-point iteration with whole-array operations.
+
+    With accelerate, iterate_atc_accelerated is used instead of the plain
+    iteration.
+    """
+    return solve_atc_state(RAM_0, PTDF_0, max_atc, threshold, negative_atc, trace, accelerate).final_atc
+
+
+class AtcState:
+    """A converged ATC solution together with the CNEC inputs, flows and settings it came from.
+
+    limited marks the rows that limited a border in some iteration, None
+    when unknown (accelerated solves).
+    """
+
+    def __init__(self, ram, ptdf, atc, flow, iterations, negative_atc=None, limited=None, max_atc=0, threshold=0.001,
+                 accelerate=False):
+        self.ram = ram
+        self.ptdf = ptdf
+        self.atc = atc
+        self.flow = flow
+        self.iterations = iterations
+        self.negative_atc = negative_atc
+        self.limited = limited
+        self.max_atc = max_atc
+        self.threshold = threshold
+        self.accelerate = accelerate
+
+    @property
+    def final_atc(self):
+        """Positive ATCs limited by the negative ATCs, if any."""
+        if self.negative_atc is None:
+            return self.atc
+        return np.minimum(self.atc, self.negative_atc)
+
+
+def solve_atc_state(RAM_0, PTDF_0, max_atc=0, threshold=0.001, negative_atc=None, trace=None, accelerate=False):
+    """Solve from zero ATCs and keep the state needed to reuse the solution in reuse_atc."""
+    ram, ptdf = as_matrices(RAM_0, PTDF_0)
+    if accelerate:
+        atc, flow, iterations = iterate_atc_accelerated(
+            ram, ptdf, np.zeros(ptdf.shape[1]), np.zeros(len(ram)), max_atc, threshold, trace
+        )
+        return AtcState(ram, ptdf, atc, flow, iterations, negative_atc, None, max_atc, threshold, accelerate)
+
+    limited = np.zeros(len(ram), dtype=bool)
+
+    def record(entry):
+        rows = np.asarray(entry["limiting_cnec"], dtype=int)
+        limited[rows[rows >= 0]] = True
+        if trace:
+            trace(entry)
+
+    atc, flow, iterations = iterate_atc(
+        ram, ptdf, np.zeros(ptdf.shape[1]), np.zeros(len(ram)), max_atc, threshold, record
+    )
+    return AtcState(ram, ptdf, atc, flow, iterations, negative_atc, limited, max_atc, threshold)
+
+
+def reuse_atc(state, removed=(), changed=None, added=None, trace=None):
+    """Return the state after a CNEC delta, reusing the previous ATCs exactly or solving from zero.
+
+    There is no warm start: the fixed-point iteration always starts from
+    zero ATCs, so a solve seeded with the previous ATCs could stop at a
+    different point.
+
+    removed holds row indices of state to drop, changed maps row indices to
+    their new RAM and added is a (RAM_0, PTDF_0) pair of new rows. The
+    previous ATCs are only reused when the delta leaves every iteration
+    unchanged: rows are removed or get a higher RAM and none of them ever
+    limited a border. Rows without a
+    positive PTDF never limit and may change freely. Any other delta is
+    solved from zero with the settings of state, so the result always
+    equals a cold solve. The negative ATCs of state are recomputed when
+    the delta touches a negative-RAM CNEC. iterations is 0 when the
+    previous ATCs were reused.
+    """
+    ram = state.ram.copy()
+    if changed:
+        ram[list(changed)] = list(changed.values())
+    keep = np.ones(len(ram), dtype=bool)
+    keep[list(removed)] = False
+    touched = ~keep | (ram != state.ram)
+
+    new_ram, new_ptdf = ram[keep], state.ptdf[keep]
+    added_negative = False
+    if added is not None:
+        added_ram, added_ptdf = as_matrices(*added)
+        new_ram = np.concatenate([new_ram, added_ram])
+        new_ptdf = np.concatenate([new_ptdf, added_ptdf.reshape(len(added_ram), new_ptdf.shape[1])])
+        added_negative = (added_ram < 0).any()
+
+    # A row with negative RAM before or after the delta changes the negative pass
+    negative = state.negative_atc
+    if negative is not None and (added_negative or (touched & ((state.ram < 0) | (ram < 0))).any()):
+        negative = negative_atc(new_ram, new_ptdf)
+
+    relaxed = (ram >= state.ram) | ~(state.ptdf > 0).any(axis=1)
+    reusable = (
+        state.limited is not None
+        and (added is None or len(added_ram) == 0)
+        and not (touched & state.limited).any()
+        and (relaxed | ~keep).all()
+    )
+    if not reusable:
+        return solve_atc_state(new_ram, new_ptdf, state.max_atc, state.threshold, negative, trace, state.accelerate)
+    return AtcState(new_ram, new_ptdf, state.atc, state.flow[keep], 0, negative, state.limited[keep], state.max_atc,
+                    state.threshold)
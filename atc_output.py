@@ -0,0 +1,112 @@
+"""Columnar ATC output partitioned by MTU date.
+
+Every MTU becomes one row per border with the schema
+(mtu_utc, border, atc_mw, limiting_cnec_id, iterations). Rows are
+buffered and written in bulk to <root>/date=YYYY-MM-DD/, as Parquet when
+pyarrow is installed and as CSV otherwise, so pandas or duckdb can read
+the whole directory as a hive-partitioned dataset.
+"""
+import csv
+import logging
+import os
+import time
+
+import numpy as np
+
+from topology import BORDERS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Define constants and configurations
+OUTPUT_DIR = "atc_output"
+FORMAT = "auto"  # "parquet", "csv" or "auto" (Parquet when pyarrow is installed)
+SCHEMA = ("mtu_utc", "border", "atc_mw", "limiting_cnec_id", "iterations")
+BATCH_MTUS = 24 * 31  # MTUs buffered before a bulk write
+CSV_DECIMALS = 3  # 1 kW, the convergence threshold of the iteration
+
+logger = logging.getLogger(__name__)
+
+
+class AtcWriter:
+    """Buffer ATC results per MTU and append them to date partitions in bulk.
+
+    The buffer is written every batch_mtus MTUs, with batch_mtus=0 only
+    when flush() is called.
+    """
+
+    def __init__(self, root=OUTPUT_DIR, format=FORMAT, batch_mtus=BATCH_MTUS):
+        if format == "auto":
+            format = "parquet" if pa is not None else "csv"
+        if format not in ("parquet", "csv"):
+            raise ValueError(f"Unknown output format: {format}")
+        if format == "parquet" and pa is None:
+            raise ValueError("Parquet output needs pyarrow, install it or use format='csv'")
+        self.root = root
+        self.format = format
+        self.batch_mtus = batch_mtus
+        self.partitions = {}
+        self.buffered = 0
+
+    def add(self, mtu_utc, atc, limiting_cnec_id=None, iterations=None):
+        """Buffer the ATCs of one MTU, one value per border in BORDERS order.
+
+        limiting_cnec_id holds one CNEC ID per border, -1 where no CNEC
+        limits it.
+        """
+        if limiting_cnec_id is None:
+            limiting_cnec_id = [-1] * len(BORDERS)
+        iterations = -1 if iterations is None else iterations
+        rows = self.partitions.setdefault(mtu_utc[:10], [])
+        rows.extend(zip([mtu_utc] * len(BORDERS), BORDERS, atc, limiting_cnec_id, [iterations] * len(BORDERS)))
+        self.buffered += 1
+        if self.batch_mtus and self.buffered >= self.batch_mtus:
+            self.flush()
+
+    def flush(self):
+        """Append every buffered row to its date partition."""
+        for date, rows in self.partitions.items():
+            directory = os.path.join(self.root, f"date={date}")
+            os.makedirs(directory, exist_ok=True)
+            if self.format == "parquet":
+                self._write_parquet(directory, rows)
+            else:
+                self._write_csv(directory, rows)
+        if self.buffered:
+            logger.info(f"Wrote ATCs of {self.buffered} MTUs to {self.root}")
+        self.partitions = {}
+        self.buffered = 0
+
+    def _write_parquet(self, directory, rows):
+        # Parquet files cannot be appended to, every flush adds a part file
+        columns = list(zip(*rows))
+        table = pa.table({
+            "mtu_utc": pa.array(np.array([mtu.rstrip("Z") for mtu in columns[0]], dtype="datetime64[ms]"),
+                                pa.timestamp("ms", tz="UTC")),
+            "border": pa.array(columns[1]).dictionary_encode(),
+            "atc_mw": pa.array(columns[2], pa.float64()),
+            "limiting_cnec_id": pa.array(columns[3], pa.int64()),
+            "iterations": pa.array(columns[4], pa.int32()),
+        })
+        pq.write_table(table, os.path.join(directory, f"part-{time.time_ns()}.parquet"))
+
+    def _write_csv(self, directory, rows):
+        path = os.path.join(directory, "atc.csv")
+        new_file = not os.path.exists(path)
+        with open(path, "a", newline="") as file:
+            writer = csv.writer(file)
+            if new_file:
+                writer.writerow(SCHEMA)
+            writer.writerows(
+                (mtu, border, round(atc, CSV_DECIMALS), cnec, iterations)
+                for mtu, border, atc, cnec, iterations in rows
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
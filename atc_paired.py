@@ -0,0 +1,119 @@
+import numpy as np
+
+from atc_numpy import as_matrices
+from atc_trace import PhaseTimer
+
+
+class PairedPtdf:
+    """Positive PTDFs of both directions of every physical border in one signed column.
+
+    The iteration only uses max(PTDF, 0), and at most one direction of a
+    physical border has a positive PTDF on any CNEC. Column p holds the
+    forward positive PTDF minus the backward one, so its sign tells the
+    direction and its magnitude the value, in half the columns of the
+    oriented matrix.
+    """
+
+    def __init__(self, ptdf, forward, backward):
+        self.n_border = ptdf.shape[1]
+        self.forward = np.asarray(forward, dtype=int)
+        self.backward = np.asarray(backward, dtype=int)
+        paired = self.backward >= 0
+
+        forward_ptdf = np.maximum(ptdf[:, self.forward], 0)
+        backward_ptdf = np.where(paired, np.maximum(ptdf[:, np.maximum(self.backward, 0)], 0), 0)
+        if ((forward_ptdf > 0) & (backward_ptdf > 0)).any():
+            raise ValueError("Both directions of a border have a positive PTDF, the columns are not antisymmetric")
+        self.signed = forward_ptdf - backward_ptdf
+        self.magnitude = np.abs(self.signed)
+        self.positive = self.signed > 0
+        self.negative = self.signed < 0
+        self.inv_ptdf = np.divide(1.0, self.magnitude, out=np.zeros_like(self.magnitude), where=self.magnitude > 0)
+        self.count = (self.magnitude > 0).sum(axis=1)
+
+        # Position of every oriented border in the forward values followed by the backward ones
+        n_physical = len(self.forward)
+        self.gather = np.empty(self.n_border, dtype=int)
+        self.gather[self.forward] = np.arange(n_physical)
+        self.gather[self.backward[paired]] = n_physical + np.flatnonzero(paired)
+        self.constrained = self.merge(self.positive.any(axis=0), self.negative.any(axis=0))
+
+    def split(self, atc):
+        """Return the forward and backward ATCs of every physical border, 0 where a direction is missing."""
+        # The appended 0 is picked by the -1 of a missing reverse
+        padded = np.append(atc, 0)
+        return padded[self.forward], padded[self.backward]
+
+    def flow(self, atc):
+        """Return max(PTDF, 0) @ atc from the signed columns."""
+        forward_atc, backward_atc = self.split(atc)
+        return self.signed @ ((forward_atc - backward_atc) / 2) + self.magnitude @ ((forward_atc + backward_atc) / 2)
+
+    def merge(self, forward_values, backward_values):
+        """Scatter per-physical-border values of both directions back to the oriented borders."""
+        return np.concatenate((forward_values, backward_values))[self.gather]
+
+
+def solve_atc_paired(RAM_0, PTDF_0, forward, backward, max_atc=0, threshold=0.001, negative_atc=None, trace=None):
+    """Run the ATC fixed-point iteration on one signed PTDF column per physical border.
+
+    forward and backward hold the oriented column of both directions of
+    every physical border, -1 for a missing reverse, see topology.Region.
+    Returns the ATCs of the oriented borders.
+    """
+    ram, ptdf = as_matrices(RAM_0, PTDF_0)
+    paired = PairedPtdf(ptdf, forward, backward)
+    max_ram = np.maximum(ram, 0)
+    constrained = paired.constrained
+    n_cnec = len(max_ram)
+
+    atc = np.zeros(paired.n_border)
+    flow = np.zeros(n_cnec)
+    iterations = 0
+    difference = 1
+    while difference > threshold:
+        timer = PhaseTimer() if trace else None
+
+        # Remaining margin after the ATCs of the previous iteration
+        ram_ini = np.maximum(max_ram - flow, 0)
+        if timer:
+            timer.lap("ram_update")
+
+        # One ratio per physical border, its sign decides the direction it limits
+        share = np.divide(ram_ini, paired.count, out=np.zeros_like(ram_ini), where=paired.count > 0)
+        ratio = share[:, None] * paired.inv_ptdf
+        forward_2d = np.where(paired.positive, ratio, np.inf)
+        backward_2d = np.where(paired.negative, ratio, np.inf)
+        if n_cnec:
+            atc_min = paired.merge(forward_2d.min(axis=0), backward_2d.min(axis=0))
+        else:
+            atc_min = np.full(paired.n_border, np.inf)
+        if timer:
+            timer.lap("border_min")
+
+        # No CNEC constrains these borders, only the cap applies
+        added_atc = np.where(constrained, atc + atc_min, max_atc if max_atc != 0 else atc)
+        limited_atc = np.minimum(added_atc, max_atc) if max_atc != 0 else added_atc
+        if timer:
+            timer.lap("clipping")
+
+        difference = limited_atc.sum() - atc.sum()
+        atc = limited_atc
+        flow = paired.flow(atc)
+        iterations += 1
+
+        if trace:
+            if n_cnec:
+                limiting = paired.merge(forward_2d.argmin(axis=0), backward_2d.argmin(axis=0))
+            else:
+                limiting = np.full(paired.n_border, -1)
+            trace({
+                "iteration": iterations,
+                "seconds": timer.seconds,
+                "atc_change": float(difference),
+                "limiting_cnec": np.where(constrained, limiting, -1).tolist(),
+            })
+
+    if negative_atc is not None:
+        atc = np.minimum(atc, negative_atc)
+    return atc
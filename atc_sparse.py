@@ -0,0 +1,110 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from atc_numpy import as_matrices
+from atc_trace import PhaseTimer
+
+# Define constants and configurations
+BLOCK_ROWS = 4096  # PTDF rows scanned at once while building the CSR
+
+
+class SparsePtdf:
+    """Positive zone-to-zone PTDFs above a significance threshold, stored once per MTU.
+
+    The matrix is kept in CSR form for the CNEC flows and as column-sorted
+    (CSC order) arrays for the per-border minimum, so both steps of the
+    iteration only touch the nonzeros. The CSR is gathered from the PTDFs
+    in blocks of BLOCK_ROWS rows, so no full-size mask or copy is made.
+    """
+
+    def __init__(self, ptdf, min_ptdf=0):
+        self.shape = ptdf.shape
+        smallest = max(min_ptdf, np.finfo(float).tiny)
+        columns = [np.empty(0, dtype=np.int64)]
+        values = [np.empty(0)]
+        count = np.zeros(self.shape[0], dtype=np.int64)
+        for start in range(0, self.shape[0], BLOCK_ROWS):
+            block = ptdf[start:start + BLOCK_ROWS]
+            rows, block_columns = np.nonzero(block >= smallest)
+            columns.append(block_columns)
+            values.append(block[rows, block_columns])
+            count[start:start + len(block)] = np.bincount(rows, minlength=len(block))
+        indptr = np.concatenate(([0], np.cumsum(count)))
+        self.csr = csr_matrix((np.concatenate(values), np.concatenate(columns), indptr), shape=self.shape)
+        self.count = np.diff(self.csr.indptr)
+
+        csc = self.csr.tocsc()
+        self.rows = csc.indices
+        self.inv_ptdf = 1.0 / csc.data
+        self.columns = np.repeat(np.arange(self.shape[1]), np.diff(csc.indptr))
+        self.constrained = np.diff(csc.indptr) > 0
+        self.starts = csc.indptr[:-1][self.constrained]
+
+    @property
+    def nnz(self):
+        return self.csr.nnz
+
+    def border_min(self, share):
+        """Return min over CNECs of share / pPTDF per border and the values per nonzero."""
+        ratio = share[self.rows] * self.inv_ptdf
+        atc_min = np.full(self.shape[1], np.inf)
+        if len(ratio):
+            atc_min[self.constrained] = np.minimum.reduceat(ratio, self.starts)
+        return atc_min, ratio
+
+    def limiting_rows(self, ratio):
+        """Return the CNEC holding the minimum per border, -1 where none does."""
+        limiting = np.full(self.shape[1], -1)
+        order = np.lexsort((ratio, self.columns))
+        first = np.searchsorted(self.columns[order], np.flatnonzero(self.constrained))
+        limiting[self.constrained] = self.rows[order[first]]
+        return limiting
+
+
+def solve_atc_sparse(RAM_0, PTDF_0, max_atc=0, threshold=0.001, negative_atc=None, min_ptdf=0, trace=None):
+    """Run the ATC fixed-point iteration over the significant positive PTDFs only."""
+    ram, ptdf = as_matrices(RAM_0, PTDF_0)
+    sparse = SparsePtdf(ptdf, min_ptdf)
+    max_ram = np.maximum(ram, 0)
+    has_positive = sparse.count > 0
+
+    atc = np.zeros(ptdf.shape[1])
+    flow = np.zeros(len(ram))
+    iterations = 0
+    difference = 1
+    while difference > threshold:
+        timer = PhaseTimer() if trace else None
+
+        # Remaining margin after the ATCs of the previous iteration
+        ram_ini = np.maximum(max_ram - flow, 0)
+        if timer:
+            timer.lap("ram_update")
+
+        # Share the margin equally and take the minimum exchange per border
+        share = np.divide(ram_ini, sparse.count, out=np.zeros_like(ram_ini), where=has_positive)
+        atc_min, ratio = sparse.border_min(share)
+        if timer:
+            timer.lap("border_min")
+
+        # No CNEC constrains these borders, only the cap applies
+        added_atc = np.where(sparse.constrained, atc + atc_min, max_atc if max_atc != 0 else atc)
+        limited_atc = np.minimum(added_atc, max_atc) if max_atc != 0 else added_atc
+        if timer:
+            timer.lap("clipping")
+
+        difference = limited_atc.sum() - atc.sum()
+        atc = limited_atc
+        flow = sparse.csr @ atc
+        iterations += 1
+
+        if trace:
+            trace({
+                "iteration": iterations,
+                "seconds": timer.seconds,
+                "atc_change": float(difference),
+                "limiting_cnec": sparse.limiting_rows(ratio).tolist(),
+            })
+
+    if negative_atc is not None:
+        atc = np.minimum(atc, negative_atc)
+    return atc
@@ -0,0 +1,83 @@
+import json
+import time
+
+
+class AtcTrace:
+    """Collect per-iteration records of the ATC fixed-point loop.
+
+    Pass an instance (or any callable taking one dict) as ``trace`` to the
+    ATC engines. Every iteration produces a record with the iteration
+    number, the wall time per phase in seconds, the total ATC change and
+    the index of the limiting CNEC per border (-1 when no CNEC limits it).
+    One-off phases such as the negative-RAM pass are recorded with
+    iteration 0. The last of them holds, as negative_limiting_cnec, the
+    negative-RAM CNEC of every border whose final ATC it sets. Engines
+    that cannot report every iteration, such as the Numba kernel, send one
+    record numbered with their iteration count.
+    """
+
+    def __init__(self, callback=None):
+        self.records = []
+        self.callback = callback
+
+    def __call__(self, record):
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    @property
+    def iterations(self):
+        return max((record["iteration"] for record in self.records), default=0)
+
+    @property
+    def limiting_cnec(self):
+        """Return the CNEC per border that set the final ATC, or None.
+
+        That is the limiting CNEC of the last iteration, unless a
+        negative-RAM CNEC gave the border a lower ATC.
+        """
+        limiting = negative = None
+        for record in reversed(self.records):
+            if negative is None and "negative_limiting_cnec" in record:
+                negative = record["negative_limiting_cnec"]
+            if "limiting_cnec" in record:
+                limiting = record["limiting_cnec"]
+                break
+        if limiting is None or negative is None:
+            return limiting
+        return [row if row >= 0 else cnec for cnec, row in zip(limiting, negative)]
+
+    def phase_totals(self):
+        """Return the summed wall time per phase."""
+        totals = {}
+        for record in self.records:
+            for phase, seconds in record["seconds"].items():
+                totals[phase] = totals.get(phase, 0) + seconds
+        return totals
+
+    def to_dict(self):
+        return {
+            "iterations": self.iterations,
+            "seconds": self.phase_totals(),
+            "records": self.records,
+        }
+
+    def to_json(self, path=None):
+        """Return the trace as JSON, or write it to path."""
+        if path is None:
+            return json.dumps(self.to_dict())
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+
+class PhaseTimer:
+    """Measure consecutive phases of one iteration with perf_counter."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.seconds[phase] = now - self.last
+        self.last = now
@@ -0,0 +1,141 @@
+"""Backfill ATCs for every MTU of a date range on a process pool.
+
+Results are appended to a CSV with one column per border. The file is
+also the checkpoint: MTUs already present are skipped on the next run,
+so an interrupted backfill resumes where it stopped. With --output-dir
+the results are also written to the columnar store of atc_output, and an
+MTU only enters the checkpoint once its columnar rows are on disk.
+"""
+import argparse
+import csv
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import jao_client
+from topology import BORDERS
+
+# Define constants and configurations
+OUTPUT_FILE = "atc_backfill.csv"
+WORKERS = os.cpu_count() or 1
+
+logger = logging.getLogger(__name__)
+
+
+def solve_window(window, engine, max_atc, threshold):
+    """Load and solve one MTU in a worker process.
+
+    Returns (mtu_utc, atc, limiting_cnec_id, iterations), atc is None on
+    failure and limiting_cnec_id holds the JAO id of the limiting CNEC per
+    border.
+    """
+    import main
+    from atc_trace import AtcTrace
+
+    inputs = main.load_atc_inputs(*window, with_cnecs=True)
+    if inputs is None:
+        return window[0], None, None, None
+    RAM_0, PTDF_0, cnecs = inputs
+    trace = AtcTrace()
+    atc = main.solve_atc_inputs(RAM_0, PTDF_0, engine, max_atc, threshold, trace)
+    limiting = trace.limiting_cnec
+    return window[0], atc, None if limiting is None else cnecs.ids(limiting), trace.iterations
+
+
+def read_checkpoint(output_file):
+    """Return the MTUs already written, dropping a trailing partial row."""
+    if not os.path.exists(output_file):
+        return set()
+
+    with open(output_file, "rb+") as file:
+        content = file.read()
+        if content and not content.endswith(b"\n"):
+            file.truncate(content.rfind(b"\n") + 1)
+
+    with open(output_file, newline="") as file:
+        rows = csv.reader(file)
+        next(rows, None)
+        return {row[0] for row in rows if len(row) == len(BORDERS) + 1}
+
+
+def backfill(from_utc, to_utc, output_file=OUTPUT_FILE, workers=WORKERS, engine=None, max_atc=None, threshold=None,
+             output_dir=None):
+    """Solve every hourly MTU between from_utc and to_utc that is not yet in output_file."""
+    import main
+
+    engine = engine or main.ENGINE
+    max_atc = main.MAX_ATC if max_atc is None else max_atc
+    threshold = main.CONVERGENCE_THRESHOLD if threshold is None else threshold
+
+    done = read_checkpoint(output_file)
+    windows = [window for window in jao_client.split_hours(from_utc, to_utc) if window[0] not in done]
+    logger.info(f"Backfilling {len(windows)} MTUs, {len(done)} already done")
+
+    new_file = not os.path.exists(output_file) or os.path.getsize(output_file) == 0
+    failed = 0
+    columnar = None
+    batch_mtus = 1
+    if output_dir:
+        import atc_output
+        # Flushed below together with the checkpoint rows
+        columnar = atc_output.AtcWriter(output_dir, batch_mtus=0)
+        batch_mtus = atc_output.BATCH_MTUS
+    with open(output_file, "a", newline="") as file, ProcessPoolExecutor(max_workers=workers) as executor:
+        writer = csv.writer(file)
+        if new_file:
+            writer.writerow(["mtu_utc"] + BORDERS)
+        pending = []
+
+        def checkpoint():
+            # Columnar rows first, so the CSV never lists an MTU whose rows were lost
+            if columnar:
+                columnar.flush()
+            writer.writerows(pending)
+            file.flush()
+            pending.clear()
+
+        futures = {executor.submit(solve_window, window, engine, max_atc, threshold): window for window in windows}
+        try:
+            for future in as_completed(futures):
+                try:
+                    mtu_utc, atc, limiting_cnec, iterations = future.result()
+                except Exception:
+                    # A bad payload or solver error must not stop the MTUs after it
+                    failed += 1
+                    logger.exception(f"Failed to solve {futures[future][0]}, it will be retried on the next run")
+                    continue
+                if atc is None:
+                    failed += 1
+                    logger.error(f"No ATC for {mtu_utc}, it will be retried on the next run")
+                    continue
+                if columnar:
+                    columnar.add(mtu_utc, atc, limiting_cnec, iterations)
+                pending.append([mtu_utc] + atc)
+                if len(pending) >= batch_mtus:
+                    checkpoint()
+        finally:
+            checkpoint()
+
+    logger.info(f"Backfill finished with {len(windows) - failed} MTUs written and {failed} failed")
+    return failed
+
+
+def main():
+    import main as atc_main
+
+    parser = argparse.ArgumentParser(description="Backfill ATCs for a range of MTUs.")
+    parser.add_argument("--from", dest="from_utc", required=True, help="start, e.g. 2024-01-01T00:00:00.000Z")
+    parser.add_argument("--to", dest="to_utc", required=True, help="end (exclusive)")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="CSV file, also used as checkpoint")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="number of worker processes")
+    parser.add_argument("--engine", choices=atc_main.ENGINES, help="ATC engine")
+    parser.add_argument("--output-dir", help="also write columnar output partitioned by date to this directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    failed = backfill(args.from_utc, args.to_utc, args.output, args.workers, args.engine, output_dir=args.output_dir)
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Benchmarks for CNEC processing and the ATC engines on synthetic Core-sized data.
+
+Run ``python bench.py`` to time every engine on the default cases and the
+start-up time of main.py, or ``python bench.py --save-baseline`` to store
+the results. Later runs are
+compared against the stored baseline: a case is flagged when it gets
+slower than --tolerance times its baseline or when its ATCs move by more
+than RESULT_TOLERANCE MW. Timings are too noisy to assert in the pytest
+suite, which only checks the results of one small case.
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from atc_trace import AtcTrace
+from topology import PTDF_KEYS, ZONES, border_ptdf
+
+# Define constants and configurations
+BASELINE_FILE = "bench_baseline.json"
+# (n_cnec, n_mtu, share of CNECs with negative RAM)
+CASES = [
+    (100, 1, 0), (1000, 1, 0), (5000, 1, 0), (20000, 1, 0),
+    (1000, 1, 0.01), (5000, 1, 0.01),
+    (100, 24, 0), (1000, 24, 0), (100, 96, 0), (1000, 96, 0), (1000, 24, 0.01),
+]
+REPEATS = 3
+TIME_TOLERANCE = 1.5  # flag cases slower than this factor of the baseline
+RESULT_TOLERANCE = 1e-6  # MW
+PYTHON_MAX_CNEC = 1000  # the pure-Python engine is skipped above this size
+SEED = 2025
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Fresh interpreters timed for the start-up benchmark
+STARTUP_COMMANDS = {
+    "interpreter": [sys.executable, "-c", "pass"],
+    "import_main": [sys.executable, "-c", "import main"],
+    "calculate_atc": [sys.executable, "-c", "import main; main.calculate_atc({0: {'ram': 1, 'ptdf_differences': {}}})"],
+    "cli_help": [sys.executable, "main.py", "--help"],
+}
+
+logger = logging.getLogger(__name__)
+
+
+def make_mtu(n_cnec, seed=SEED, negative_share=0):
+    """Generate RAM and zone-to-slack PTDFs resembling one presolved Core MTU.
+
+    Each CNEC gets background sensitivities to every zone plus a strong
+    pair of zones it sits between. Rows come in +/- mirror pairs and a few
+    are duplicated, as in the JAO data.
+    """
+    rng = np.random.default_rng(seed)
+    n_zone = len(ZONES)
+    n_base = (n_cnec + 1) // 2
+
+    zonal = rng.normal(0, 0.015, (n_base, n_zone))
+    rows = np.arange(n_base)
+    hot = rng.integers(0, n_zone, (n_base, 2))
+    zonal[rows, hot[:, 0]] += rng.uniform(0.05, 0.3, n_base)
+    zonal[rows, hot[:, 1]] -= rng.uniform(0.05, 0.3, n_base)
+    duplicates = rng.random(n_base) < 0.1
+    zonal[duplicates] = zonal[np.maximum(rows[duplicates] - 1, 0)]
+    zonal = np.round(zonal, 5)
+
+    ram = rng.uniform(50, 2000, n_base)
+    zonal = np.concatenate([zonal, -zonal])[:n_cnec]
+    ram = np.concatenate([ram, ram])[:n_cnec]
+    negative = rng.random(n_cnec) < negative_share
+    ram[negative] = -rng.uniform(1, 300, negative.sum())
+    return ram, zonal
+
+
+def make_records(ram, zonal):
+    """Turn synthetic arrays into JAO style records for process_cnec_data."""
+    keys = list(PTDF_KEYS.values())
+    return {"data": [dict(zip(keys, row), ram=value) for value, row in zip(ram.tolist(), zonal.tolist())]}
+
+
+def measure(function, repeats=REPEATS):
+    """Return the best wall time of several runs, the peak traced memory and the result."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def engine_solvers(mtus):
+    """Return the engine callables taking (RAM, PTDF, trace) to time for a list of (RAM, PTDF) MTUs."""
+    import atc_numba
+    import main
+
+    def solver(engine, **options):
+        return lambda ram, ptdf, trace=None: main.solve_atc_inputs(ram, ptdf, engine, trace=trace, **options)
+
+    solvers = {
+        "numpy": solver("numpy"),
+        "numpy_accelerated": solver("numpy", accelerate=True),
+        "sparse": solver("sparse"),
+        "paired": solver("paired"),
+    }
+    if atc_numba.numba is not None:
+        solvers["numba"] = solver("numba")
+    if len(mtus[0][0]) <= PYTHON_MAX_CNEC and len(mtus) == 1:
+        solvers["python"] = solver("python")
+    return solvers
+
+
+def run_case(n_cnec, n_mtu, negative_share=0, repeats=REPEATS):
+    """Benchmark processing and every engine on one synthetic case."""
+    import atc_lp
+    import atc_numpy
+    import main
+
+    zonal_mtus = [make_mtu(n_cnec, SEED + m, negative_share) for m in range(n_mtu)]
+    records = [make_records(ram, zonal) for ram, zonal in zonal_mtus]
+    mtus = [(ram, border_ptdf(zonal)) for ram, zonal in zonal_mtus]
+
+    results = {}
+    seconds, peak, _ = measure(lambda: [main.process_cnec_data(r) for r in records], repeats)
+    results["process_cnec_data"] = {"seconds": seconds, "peak_bytes": peak}
+
+    for name, solve in engine_solvers(mtus).items():
+        seconds, peak, atc = measure(lambda: [solve(ram, ptdf) for ram, ptdf in mtus], repeats)
+        # Count the iterations in a separate traced run, so tracing does not add to the timings
+        traces = [AtcTrace() for _ in mtus]
+        for (ram, ptdf), trace in zip(mtus, traces):
+            solve(ram, ptdf, trace)
+        results[name] = {
+            "seconds": seconds,
+            "peak_bytes": peak,
+            "iterations": max(trace.iterations for trace in traces),
+            "atc_sum": float(np.sum(atc)),
+        }
+
+    # LP upper bound on the positive-RAM ATC sum, and the share of it the iteration reaches
+    positive_sum = sum(atc_numpy.solve_atc_state(ram, ptdf).atc.sum() for ram, ptdf in mtus)
+    seconds, peak, bound = measure(lambda: sum(atc_lp.lp_bound(ram, ptdf) for ram, ptdf in mtus), repeats)
+    results["lp_bound"] = {
+        "seconds": seconds,
+        "peak_bytes": peak,
+        "atc_sum": bound,
+        "bound_share": float(positive_sum / bound) if bound else 1.0,
+    }
+    return results
+
+
+def run_startup(repeats=REPEATS):
+    """Return the best wall time of each start-up command in a fresh interpreter."""
+    results = {}
+    for name, command in STARTUP_COMMANDS.items():
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=ROOT, check=True, capture_output=True)
+            best = min(best, time.perf_counter() - start)
+        results[name] = {"seconds": best}
+    return results
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE):
+    """Return the list of regressions of results against a baseline."""
+    regressions = []
+    for case, runs in results.items():
+        for name, result in runs.items():
+            reference = baseline.get(case, {}).get(name)
+            if reference is None:
+                continue
+            if result["seconds"] > time_tolerance * reference["seconds"]:
+                regressions.append(f"{case} {name}: {result['seconds']:.4f}s vs {reference['seconds']:.4f}s")
+            if "atc_sum" in reference and abs(result["atc_sum"] - reference["atc_sum"]) > RESULT_TOLERANCE:
+                regressions.append(f"{case} {name}: ATC sum {result['atc_sum']} vs {reference['atc_sum']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CNEC processing and the ATC engines.")
+    parser.add_argument("--cases", help="comma separated n_cnec x n_mtu [x negative share] cases, e.g. 100x1,1000x24x0.01")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    cases = CASES
+    if args.cases:
+        cases = []
+        for case in args.cases.split(","):
+            n_cnec, n_mtu, *negative_share = case.split("x")
+            cases.append((int(n_cnec), int(n_mtu), float(negative_share[0]) if negative_share else 0))
+
+    results = {"startup": run_startup(args.repeats)}
+    for n_cnec, n_mtu, negative_share in cases:
+        case = f"{n_cnec}x{n_mtu}" + (f"x{negative_share}" if negative_share else "")
+        results[case] = run_case(n_cnec, n_mtu, negative_share, args.repeats)
+
+    for case, runs in results.items():
+        for name, result in runs.items():
+            memory = f" {result['peak_bytes'] / 2 ** 20:8.1f} MiB" if "peak_bytes" in result else ""
+            extra = f" iterations={result['iterations']}" if "iterations" in result else ""
+            extra += f" iterative/bound={result['bound_share']:.3f}" if "bound_share" in result else ""
+            print(f"{case:>10} {name:<18} {result['seconds'] * 1000:10.2f} ms{memory}{extra}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
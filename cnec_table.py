@@ -0,0 +1,136 @@
+"""Compact columnar table of CNEC identities in solver row order.
+
+Every CNEC keeps its JAO record id, its RAM and int32 codes into
+interned pools of CNEC names, TSOs and contingencies, so a contingency
+shared by hundreds of CNECs is stored once. The table is filled while the
+records are ingested and row i is row i of the RAM vector and PTDF
+matrix, so the limiting CNEC rows reported by the solver map to their
+identity by plain indexing.
+"""
+import sys
+
+import numpy as np
+
+# Define constants and configurations
+INITIAL_ROWS = 1024  # starting capacity of a table filled record by record
+STRING_FIELDS = {"cnec": "cnecName", "tso": "tso", "contingency": "contName"}  # pool name: JAO field
+
+
+class StringPool:
+    """Interned strings handed out as dense int32 codes."""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class CnecTable:
+    """Growable columns of CNEC id, RAM and interned name, TSO and contingency codes."""
+
+    def __init__(self, capacity=INITIAL_ROWS):
+        self.size = 0
+        self.pools = {name: StringPool() for name in STRING_FIELDS}
+        self._id = np.empty(capacity, dtype=np.int64)
+        self._ram = np.empty(capacity)
+        self._codes = {name: np.empty(capacity, dtype=np.int32) for name in STRING_FIELDS}
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a table from JAO CNEC records."""
+        table = cls(max(len(records), 1))
+        table.extend(records)
+        return table
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def id(self):
+        return self._id[:self.size]
+
+    @property
+    def ram(self):
+        return self._ram[:self.size]
+
+    def codes(self, name):
+        """Return the code column of the "cnec", "tso" or "contingency" pool."""
+        return self._codes[name][:self.size]
+
+    def append(self, record):
+        if self.size == len(self._id):
+            self._grow()
+        self._id[self.size] = record.get("id", -1)
+        self._ram[self.size] = record["ram"]
+        for name, field in STRING_FIELDS.items():
+            self._codes[name][self.size] = self.pools[name].code(record.get(field) or "")
+        self.size += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def _grow(self):
+        capacity = max(2 * len(self._id), INITIAL_ROWS)
+        self._id = np.resize(self._id, capacity)
+        self._ram = np.resize(self._ram, capacity)
+        self._codes = {name: np.resize(codes, capacity) for name, codes in self._codes.items()}
+
+    def ids(self, rows):
+        """Return the JAO ids of the given rows, -1 rows (no CNEC) stay -1."""
+        rows = np.asarray(rows, dtype=np.int64)
+        ids = np.full(len(rows), -1, dtype=np.int64)
+        ids[rows >= 0] = self.id[rows[rows >= 0]]
+        return ids.tolist()
+
+    def row(self, i):
+        """Return the identity and RAM of one CNEC as a dict in the JAO field names."""
+        record = {"id": int(self.id[i]), "ram": float(self.ram[i])}
+        for name, field in STRING_FIELDS.items():
+            record[field] = self.pools[name][self.codes(name)[i]]
+        return record
+
+    def take(self, rows):
+        """Return a new table with the given rows, sharing the string pools."""
+        rows = np.asarray(rows, dtype=np.int64)
+        table = CnecTable(0)
+        table.size = len(rows)
+        table.pools = self.pools
+        table._id = self.id[rows]
+        table._ram = self.ram[rows]
+        table._codes = {name: self.codes(name)[rows] for name in STRING_FIELDS}
+        return table
+
+    def arrays(self):
+        """Return the columns and string pools as plain arrays, e.g. for np.savez."""
+        arrays = {"id": self.id, "ram": self.ram}
+        for name in STRING_FIELDS:
+            arrays[f"{name}_codes"] = self.codes(name)
+            arrays[f"{name}_pool"] = np.array(self.pools[name].values, dtype=str)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a table from the output of arrays()."""
+        table = cls(0)
+        table.size = len(arrays["id"])
+        table._id = np.asarray(arrays["id"], dtype=np.int64)
+        table._ram = np.asarray(arrays["ram"], dtype=np.float64)
+        for name in STRING_FIELDS:
+            table.pools[name] = StringPool(arrays[f"{name}_pool"].tolist())
+            table._codes[name] = np.asarray(arrays[f"{name}_codes"], dtype=np.int32)
+        return table
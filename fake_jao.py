@@ -0,0 +1,150 @@
+"""Local stand-in for the JAO publication tool API, for development and benchmarks."""
+import datetime
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from jao_client import format_utc, parse_utc
+
+ZONES = ["AT", "BE", "CZ", "DE", "FR", "HR", "HU", "NL", "PL", "RO", "SI", "SK"]
+TSOS = ["APG", "ELIA", "CEPS", "50HERTZ", "AMPRION", "TENNET_GMBH", "TRANSNETBW", "RTE",
+        "HOPS", "MAVIR", "TENNET_BV", "PSE", "TRANSELECTRICA", "ELES", "SEPS"]
+
+
+def make_records(from_utc, n_cnec, seed=0, negative_share=0.05):
+    """Generate seeded presolved CNEC records for one MTU in the JAO layout."""
+    rng = random.Random(f"{seed}:{from_utc}")
+    records = []
+    for i in range(n_cnec):
+        record = {
+            "id": i,
+            "dateTimeUtc": from_utc,
+            "tso": rng.choice(TSOS),
+            "cnecName": f"CNEC {i // 4} line {i % 4}",
+            "contName": "BASECASE" if i % 3 == 0 else f"CO {rng.randrange(500)}",
+            "presolved": True,
+            "ram": rng.uniform(-300, -1) if rng.random() < negative_share else rng.uniform(50, 2000),
+        }
+        for zone in ZONES:
+            record[f"ptdf_{zone}"] = round(rng.gauss(0, 0.05), 5)
+        records.append(record)
+    return records
+
+
+class FakeJao:
+    """Serve generated records on /<endpoint> with JAO style Skip/Take paging.
+
+    The first failures requests are answered with failure_status, e.g. 503
+    or 429, to exercise the client retries.
+
+    With etags, responses carry an ETag and matching If-None-Match requests
+    get 304 Not Modified. Edit the lists returned by records() to publish
+    changed data.
+
+    With max_take, pages hold at most max_take rows whatever Take asks for,
+    like a server capping its page size.
+    """
+
+    def __init__(self, n_cnec=100, seed=0, failures=0, latency=0, host="127.0.0.1", port=0, etags=True,
+                 failure_status=503, max_take=None):
+        self.n_cnec = n_cnec
+        self.max_take = max_take
+        self.etags = etags
+        self.seed = seed
+        self.failures = failures
+        self.failure_status = failure_status
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def records(self, endpoint, from_utc, to_utc):
+        """Return every record of an endpoint between two UTC timestamps."""
+        key = (endpoint, from_utc, to_utc)
+        if key not in self.cache:
+            start = parse_utc(from_utc)
+            end = parse_utc(to_utc)
+            records = []
+            while start < end:
+                records.extend(make_records(format_utc(start), self.n_cnec, self.seed))
+                start += datetime.timedelta(hours=1)
+            self.cache[key] = records
+        return self.cache[key]
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with fake.lock:
+                    fake.requests += 1
+                    failing = fake.failures > 0
+                    if failing:
+                        fake.failures -= 1
+                time.sleep(fake.latency)
+                if failing:
+                    self.send_error(fake.failure_status)
+                    return
+
+                parsed = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                endpoint = parsed.path.rsplit("/", 1)[-1]
+                records = fake.records(endpoint, query["FromUtc"], query["ToUtc"])
+                skip = int(query.get("Skip", 0))
+                take = int(query.get("Take", len(records) or 1))
+                if fake.max_take:
+                    take = min(take, fake.max_take)
+                body = json.dumps({
+                    "data": records[skip:skip + take],
+                    "totalRowsWithFilter": len(records),
+                }).encode()
+
+                # Answer conditional requests like a server sending strong ETags
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if fake.etags and self.headers.get("If-None-Match") == etag:
+                    with fake.lock:
+                        fake.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                if fake.etags:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,182 @@
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from cnec_table import CnecTable
+from jao_client import parse_utc
+
+# Define constants and configurations
+CACHE_DIR = ".jao_cache"
+MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+TTL = 15 * 60  # seconds before a non-final entry is fetched again
+FINAL_AFTER = datetime.timedelta(days=2)  # MTUs older than this are final
+
+logger = logging.getLogger(__name__)
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class JaoCache:
+    """Content-addressed on-disk cache for raw JAO responses and processed ATC inputs.
+
+    Entries are keyed by endpoint, filter and UTC window. Raw responses are
+    stored as gzipped JSON, processed RAM/PTDF arrays and CNEC identities as
+    .npz files. The least recently used files are evicted once the cache
+    exceeds max_bytes.
+    With immutable_final, MTUs older than FINAL_AFTER never expire.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES, ttl=TTL, immutable_final=True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.immutable_final = immutable_final
+        self._size = None
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(endpoint, filter, from_utc, to_utc):
+        """Return the cache key for one request window."""
+        payload = json.dumps([endpoint, filter, from_utc, to_utc])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def _is_final(self, to_utc):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return parse_utc(to_utc) <= now - FINAL_AFTER
+
+    def _fresh(self, path, to_utc):
+        """Check that a cached file exists and has not expired."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if self.immutable_final and self._is_final(to_utc):
+            return True
+        return time.time() - stat.st_mtime < self.ttl
+
+    def _write(self, path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            write(file)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        if self._size is None:
+            self.evict()
+        else:
+            self._size += size
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def _touch(self, path):
+        # The access time is the LRU clock, the modification time stays the write time.
+        # Other processes share the directory, a file evicted meanwhile needs no touch.
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except FileNotFoundError:
+            pass
+
+    def get_raw(self, key, to_utc):
+        """Return the cached raw JSON response, or None."""
+        path = self._path(key, ".json.gz")
+        if not self._fresh(path, to_utc):
+            return None
+        try:
+            with gzip.open(path, "rt") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            # Evicted by another process since the freshness check
+            return None
+        self._touch(path)
+        return data
+
+    def put_raw(self, key, data):
+        """Store a raw JSON response."""
+        payload = gzip.compress(json.dumps(data).encode())
+        self._write(self._path(key, ".json.gz"), lambda file: file.write(payload))
+
+    def get_inputs(self, key, to_utc, with_cnecs=False):
+        """Return the cached (RAM vector, PTDF matrix) pair, or None.
+
+        with_cnecs returns (RAM, PTDF, CnecTable) instead, and None for
+        entries stored without CNEC identities.
+        """
+        path = self._path(key, ".npz")
+        if not self._fresh(path, to_utc):
+            return None
+        try:
+            with np.load(path) as arrays:
+                inputs = arrays["ram"], arrays["ptdf"]
+                if with_cnecs:
+                    if "cnec_id" not in arrays:
+                        return None
+                    columns = {name[len("cnec_"):]: arrays[name] for name in arrays.files if name.startswith("cnec_")}
+                    inputs += (CnecTable.from_arrays(dict(columns, ram=inputs[0])),)
+        except FileNotFoundError:
+            # Evicted by another process since the freshness check
+            return None
+        self._touch(path)
+        return inputs
+
+    def put_inputs(self, key, ram, ptdf, cnecs=None):
+        """Store the processed RAM vector, CNEC x border PTDF matrix and optional CnecTable."""
+        ram = np.asarray(ram, dtype=np.float64)
+        ptdf = np.asarray(ptdf, dtype=np.float64).reshape(len(ram), -1)
+        columns = {}
+        if cnecs is not None:
+            columns = {f"cnec_{name}": array for name, array in cnecs.arrays().items() if name != "ram"}
+        self._write(self._path(key, ".npz"), lambda file: np.savez(file, ram=ram, ptdf=ptdf, **columns))
+
+    def evict(self):
+        """Remove least recently used files until the cache fits in max_bytes.
+
+        Backfill workers share the directory, so files removed by another
+        process while walking it count as already evicted.
+        """
+        entries = []
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+                total += stat.st_size
+
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, path = entries.pop(0)
+            total -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            logger.debug(f"Evicted {path} from the JAO cache")
+        self._size = total
+
+
+def get_cache(root=CACHE_DIR):
+    """Return the shared JaoCache of this process for root.
+
+    The cache walks its directory on the first write to learn its size and
+    then tracks it, so every MTU of a run has to go through one instance.
+    """
+    with _caches_lock:
+        if root not in _caches:
+            _caches[root] = JaoCache(root)
+        return _caches[root]
@@ -0,0 +1,338 @@
+import codecs
+import datetime
+import hashlib
+import json
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Define constants and configurations
+PAGE_SIZE = 1000
+MAX_WORKERS = 8
+RETRY_TOTAL = 5
+RETRY_BACKOFF = 0.5  # seconds, doubled on every retry
+RETRY_STATUS = (429, 500, 502, 503, 504)
+TIMEOUT = 60  # seconds
+PRESOLVED_FILTER = '{"Presolved":true}'
+UTC_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
+CHUNK_SIZE = 64 * 1024  # bytes read per step when streaming a response
+INITIAL_ROWS = 1024  # starting capacity of the streamed CNEC arrays
+
+_DATA_START = re.compile(r'"data"\s*:\s*\[')
+_TOTAL_ROWS = re.compile(r'"totalRowsWithFilter"\s*:\s*(\d+)')
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the shared pooled session, retrying on 429 and 5xx responses."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=RETRY_STATUS,
+                allowed_methods=["GET"],
+                respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def parse_utc(value):
+    """Parse a JAO UTC timestamp such as 2025-02-20T00:00:00.000Z."""
+    return datetime.datetime.strptime(value, UTC_FORMAT).replace(tzinfo=datetime.timezone.utc)
+
+
+def format_utc(value):
+    """Format a datetime as a JAO UTC timestamp."""
+    return value.astimezone(datetime.timezone.utc).strftime(UTC_FORMAT)
+
+
+def split_hours(from_utc, to_utc, step=datetime.timedelta(hours=1)):
+    """Split a UTC range into consecutive (FromUtc, ToUtc) windows."""
+    start = parse_utc(from_utc)
+    end = parse_utc(to_utc)
+    windows = []
+    while start < end:
+        stop = min(start + step, end)
+        windows.append((format_utc(start), format_utc(stop)))
+        start = stop
+    return windows
+
+
+def _last_page(rows, skip, take, total):
+    """Return True when a page of rows ends the paging at skip rows.
+
+    JAO may return fewer rows than Take before the end, so when the page
+    carries totalRowsWithFilter only the total ends the paging. A short page
+    ends it when there is no total, and an empty page always does.
+    """
+    if not rows:
+        return True
+    if total is not None:
+        return skip >= total
+    return rows < take
+
+
+def fetch_pages(url, from_utc, to_utc, filter=PRESOLVED_FILTER, take=PAGE_SIZE):
+    """Fetch every page of one window by advancing Skip until the data is exhausted."""
+    session = get_session()
+    records = []
+    skip = 0
+    while True:
+        params = {"Skip": skip, "Take": take, "FromUtc": from_utc, "ToUtc": to_utc}
+        if filter:
+            params["Filter"] = filter
+        response = session.get(url, params=params, timeout=TIMEOUT)
+        response.raise_for_status()
+        page = response.json()
+        rows = page.get("data", [])
+        records.extend(rows)
+        skip += len(rows)
+        total = page.get("totalRowsWithFilter")
+        if _last_page(len(rows), skip, take, total):
+            break
+    logger.debug(f"Fetched {len(records)} rows for {from_utc} - {to_utc}")
+    return {"data": records}
+
+
+def fetch_if_changed(url, from_utc, to_utc, previous=None, filter=PRESOLVED_FILTER, take=PAGE_SIZE):
+    """Fetch one window unless it is unchanged since a previous fetch.
+
+    previous is the validators dict returned by an earlier call. Every page
+    is requested with If-None-Match / If-Modified-Since where the server
+    sent an ETag or Last-Modified, and otherwise compared by a hash of the
+    body. Returns (data, validators), data is None when nothing changed.
+    """
+    session = get_session()
+    old_pages = (previous or {}).get("pages", [])
+    pages = []
+    bodies = []
+    skips = []
+    skip = 0
+    while True:
+        params = {"Skip": skip, "Take": take, "FromUtc": from_utc, "ToUtc": to_utc}
+        if filter:
+            params["Filter"] = filter
+        old = old_pages[len(pages)] if len(pages) < len(old_pages) else {}
+        headers = {}
+        if old.get("etag"):
+            headers["If-None-Match"] = old["etag"]
+        if old.get("last_modified"):
+            headers["If-Modified-Since"] = old["last_modified"]
+
+        response = session.get(url, params=params, headers=headers, timeout=TIMEOUT)
+        if response.status_code == 304:
+            page = old
+            bodies.append(None)
+        else:
+            response.raise_for_status()
+            content = response.content
+            data = json.loads(content)
+            page = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "digest": hashlib.blake2b(content, digest_size=16).hexdigest(),
+                "rows": len(data.get("data", [])),
+                "total": data.get("totalRowsWithFilter"),
+            }
+            bodies.append(data.get("data", []))
+        pages.append(page)
+        skips.append(skip)
+        skip += page["rows"]
+        if _last_page(page["rows"], skip, take, page["total"]):
+            break
+
+    validators = {"pages": pages}
+    if [page["digest"] for page in pages] == [page["digest"] for page in old_pages]:
+        logger.debug(f"Unchanged {from_utc} - {to_utc}")
+        return None, validators
+
+    # Something changed, pages answered with 304 still have to be downloaded
+    records = []
+    for page_skip, rows in zip(skips, bodies):
+        if rows is None:
+            params = {"Skip": page_skip, "Take": take, "FromUtc": from_utc, "ToUtc": to_utc}
+            if filter:
+                params["Filter"] = filter
+            response = session.get(url, params=params, timeout=TIMEOUT)
+            response.raise_for_status()
+            rows = response.json().get("data", [])
+        records.extend(rows)
+    logger.debug(f"Fetched {len(records)} changed rows for {from_utc} - {to_utc}")
+    return {"data": records}, validators
+
+
+def fetch_range(url, from_utc, to_utc, filter=PRESOLVED_FILTER, take=PAGE_SIZE, max_workers=MAX_WORKERS):
+    """Fetch a UTC range as per-hour windows concurrently over the pooled session.
+
+    Returns a dict keyed by the FromUtc of each window. Windows that fail
+    after all retries are logged and mapped to None.
+    """
+    windows = split_hours(from_utc, to_utc)
+
+    def fetch_window(window):
+        try:
+            return fetch_pages(url, window[0], window[1], filter, take)
+        except requests.exceptions.RequestException as err:
+            logger.error(f"Error fetching {window[0]} - {window[1]}: {err}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(fetch_window, windows))
+
+    logger.info(f"Fetched {len(windows)} windows from {url}")
+    return {window[0]: result for window, result in zip(windows, results)}
+
+
+def iter_records(chunks):
+    """Yield the objects of the top-level "data" array from a stream of byte chunks.
+
+    Only one record is decoded at a time, so memory does not grow with the
+    size of the response. The value of totalRowsWithFilter, if present, is
+    returned when the generator is exhausted.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    head = ""
+    pos = 0
+    exhausted = False
+
+    def read_more():
+        nonlocal buffer, pos, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer = buffer[pos:] + text.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + text.decode(chunk)
+        pos = 0
+
+    # Skip everything up to the opening bracket of the data array
+    while True:
+        match = _DATA_START.search(buffer)
+        if match:
+            head = buffer[:match.start()]
+            pos = match.end()
+            break
+        if exhausted:
+            return None
+        read_more()
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos == len(buffer):
+            if exhausted:
+                raise ValueError("Unterminated data array in JAO response")
+            read_more()
+            continue
+        if buffer[pos] == "]":
+            pos += 1
+            break
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The record is split across chunks
+            if exhausted:
+                raise
+            read_more()
+            continue
+        pos = end
+        yield record
+
+    tail = buffer[pos:]
+    buffer, pos = "", 0
+    while not exhausted:
+        read_more()
+        tail += buffer
+        buffer = ""
+    match = _TOTAL_ROWS.search(head) or _TOTAL_ROWS.search(tail)
+    return int(match.group(1)) if match else None
+
+
+class CnecArrays:
+    """Growable typed arrays holding zone-to-slack PTDFs per CNEC.
+
+    The RAM and the identity of every CNEC go to a cnec_table.CnecTable
+    in the same row order. A missing or null PTDF is stored as NaN, see
+    topology.Region.border_ptdf.
+    """
+
+    def __init__(self, zones, capacity=INITIAL_ROWS):
+        import numpy as np
+
+        from cnec_table import CnecTable
+
+        self.zones = list(zones)
+        self.keys = [f"ptdf_{zone}" for zone in self.zones]
+        self.cnecs = CnecTable(capacity)
+        self.ptdf = np.empty((capacity, len(self.zones)))
+
+    @property
+    def size(self):
+        return len(self.cnecs)
+
+    def append(self, record):
+        if self.size == len(self.ptdf):
+            self._grow()
+        # None becomes NaN in the float row
+        self.ptdf[self.size] = [record.get(key) for key in self.keys]
+        self.cnecs.append(record)
+
+    def _grow(self):
+        import numpy as np
+
+        ptdf = np.empty((2 * len(self.ptdf), len(self.zones)))
+        ptdf[:self.size] = self.ptdf[:self.size]
+        self.ptdf = ptdf
+
+    def arrays(self):
+        """Return the filled (RAM vector, zonal PTDF matrix) views."""
+        return self.cnecs.ram, self.ptdf[:self.size]
+
+
+def stream_cnec_arrays(url, from_utc, to_utc, zones, filter=PRESOLVED_FILTER, take=PAGE_SIZE, with_cnecs=False):
+    """Fetch one window page by page straight into RAM and zonal PTDF arrays.
+
+    with_cnecs also returns the cnec_table.CnecTable of the streamed rows.
+    """
+    session = get_session()
+    cnec_arrays = CnecArrays(zones)
+    skip = 0
+    while True:
+        params = {"Skip": skip, "Take": take, "FromUtc": from_utc, "ToUtc": to_utc}
+        if filter:
+            params["Filter"] = filter
+        with session.get(url, params=params, timeout=TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            records = iter_records(response.iter_content(CHUNK_SIZE))
+            rows = 0
+            while True:
+                try:
+                    cnec_arrays.append(next(records))
+                except StopIteration as stop:
+                    total = stop.value
+                    break
+                rows += 1
+        skip += rows
+        if _last_page(rows, skip, take, total):
+            break
+    if with_cnecs:
+        return (*cnec_arrays.arrays(), cnec_arrays.cnecs)
+    return cnec_arrays.arrays()
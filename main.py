@@ -1,12 +1,21 @@
-import requests
-from urllib.parse import urlencode
+"""Fetch the Core ID final computation from JAO and extract ATCs per border.
+
+Run ``python main.py --from 2025-02-20T00:00:00.000Z --to 2025-02-20T03:00:00.000Z``.
+Importing this module is cheap: requests, numpy and the solver backends
+are imported on first use, and logging is only configured by the CLI.
+"""
+import argparse
 import logging
 import json
+from urllib.parse import urlencode
+
+import topology
+from atc_trace import AtcTrace, PhaseTimer
 
 # Define constants and configurations
 FROM_UTC = "2025-02-20T00:00:00.000Z"
 TO_UTC = "2025-02-20T01:00:00.000Z"
-FINAL_URL = "https://publicationtool.jao.eu/coreID/api/data/IDCCB_finalComputation"
+FINAL_URL = topology.CORE.endpoint  # see topology.json
 
 PARAMS_FINAL = {
     "Filter": '{"Presolved":true}',
@@ -20,38 +29,39 @@ PARAMS_IDCCA = {
     "ToUtc": TO_UTC
 }
 
-ENCODED_PARAMS_FINAL = urlencode(PARAMS_FINAL)
-FINAL_COMPUTATION_URL = f"{FINAL_URL}?{ENCODED_PARAMS_FINAL}"
-
-
-BORDER_MAPPING = {
-    "AT": ["CZ", "DE", "HU", "SI"],
-    "BE": ["DE", "FR", "NL"],
-    "CZ": ["AT", "DE", "PL", "SK"],
-    "DE": ["AT", "BE", "CZ", "FR", "NL", "PL"],
-    "FR": ["BE", "DE"],
-    "HR": ["HU", "SI"],
-    "HU": ["AT", "HR", "RO", "SI", "SK"],
-    "NL": ["BE", "DE"],
-    "PL": ["CZ", "DE", "SK"],
-    "RO": ["HU"],
-    "SI": ["AT", "HR", "HU"],
-    "SK": ["CZ", "HU", "PL"]
-}
+# ATC calculation settings
+MAX_ATC = 0  # MW validated by TSOs, keep 0 if not applicable
+CONVERGENCE_THRESHOLD = 0.001  # 1 kW = 0.001 MW
+ENGINES = ("python", "numpy", "numba", "sparse", "paired")
+ENGINE = "python"  # one of ENGINES
+
+# Local cache of JAO responses and processed CNEC matrices
+USE_CACHE = True
+CACHE_DIR = ".jao_cache"
+STREAM = False  # parse responses record by record into typed arrays
+PRESOLVE = False  # drop duplicate and dominated CNECs before solving
+MIN_PTDF = 0  # positive zone-to-zone PTDFs below this are set to zero
+ACCELERATE = False  # extrapolate slow iteration tails, numpy engine only
 
-PTDF_KEYS = {country: f"ptdf_{country}" for country in BORDER_MAPPING.keys()}
+# Columnar output, see atc_output
+OUTPUT_DIR = "atc_output"
+OUTPUT_FORMAT = "auto"  # "parquet", "csv" or "auto"
+
+OUTPUT_FILE = "atc_results.json"
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def fetch_data_from_jao(url):
     """Fetch data from the JAO  API."""
+    import requests
+
+    import jao_client
+
     try:
-        with requests.Session() as session:
-            response = session.get(url)
-            response.raise_for_status()
-            logger.info(f"JAO request code: {response.status_code}")
-            return response.json()
+        response = jao_client.get_session().get(url, timeout=jao_client.TIMEOUT)
+        response.raise_for_status()
+        logger.info(f"JAO request code: {response.status_code}")
+        return response.json()
     except requests.exceptions.HTTPError as err:
         logger.error(f"HTTP error occurred: {err}")
     except requests.exceptions.ConnectionError as err:
@@ -62,211 +72,420 @@ def fetch_data_from_jao(url):
         logger.error(f"Error fetching data: {err}")
     return None
 
-def process_cnec_data(data):
+def process_cnec_data(data, region=None):
     """Process CNEC data and calculate border PTDF differences."""
+    import numpy as np
+
+    region = region or topology.CORE
+    records = data.get("data", [])
+    zonal_ptdf = np.array(
+        [[cnec.get(key, np.nan) for key in region.ptdf_keys.values()] for cnec in records],
+        dtype=np.float64,
+    ).reshape(len(records), len(region.ptdf_keys))
+    missing = np.isnan(zonal_ptdf)
+    ptdf_differences = region.border_ptdf(np.where(missing, 0, zonal_ptdf))
+    # Borders touching a zone missing from the record are skipped
+    ptdf_differences[(missing @ np.abs(region.incidence)) > 0] = np.nan
+    ptdf_differences = ptdf_differences.tolist()
+
     cnec_data = {}
-    
-    for idx, cnec in enumerate(data.get("data", [])):
+    for idx, cnec in enumerate(records):
         cnec_data[idx] = {
             "ram": cnec["ram"],
             "ptdf_differences": {
-                f"{source.lower()}{target.lower()}": cnec[PTDF_KEYS[source]] - cnec[PTDF_KEYS[target]]
-                for source, targets in BORDER_MAPPING.items()
-                for target in targets
-                if PTDF_KEYS[source] in cnec and PTDF_KEYS[target] in cnec
+                border: ptdf
+                for border, ptdf in zip(region.borders, ptdf_differences[idx])
+                if ptdf == ptdf
             }
         }
 
     return cnec_data
 
-def calculate_atc(cnec_data):
-    RAM_0 = [item['ram'] for item in cnec_data.values()]
-
-    PTDF_0 = [
-        [
-            item['ptdf_differences'].get('atcz', None),
-            item['ptdf_differences'].get('atde', None),
-            item['ptdf_differences'].get('athu', None),
-            item['ptdf_differences'].get('atsi', None),
-            item['ptdf_differences'].get('bede', None),
-            item['ptdf_differences'].get('befr', None),
-            item['ptdf_differences'].get('benl', None),
-            item['ptdf_differences'].get('czat', None),
-            item['ptdf_differences'].get('czde', None),
-            item['ptdf_differences'].get('czpl', None),
-            item['ptdf_differences'].get('czsk', None),
-            item['ptdf_differences'].get('deat', None),
-            item['ptdf_differences'].get('debe', None),
-            item['ptdf_differences'].get('decz', None),
-            item['ptdf_differences'].get('defr', None),
-            item['ptdf_differences'].get('denl', None),
-            item['ptdf_differences'].get('depl', None),
-            item['ptdf_differences'].get('frbe', None),
-            item['ptdf_differences'].get('frde', None),
-            item['ptdf_differences'].get('hrhu', None),
-            item['ptdf_differences'].get('hrsi', None),
-            item['ptdf_differences'].get('huat', None),
-            item['ptdf_differences'].get('huhr', None),
-            item['ptdf_differences'].get('huro', None),
-            item['ptdf_differences'].get('husi', None),
-            item['ptdf_differences'].get('husk', None),
-            item['ptdf_differences'].get('nlbe', None),
-            item['ptdf_differences'].get('nlde', None),
-            item['ptdf_differences'].get('plcz', None),
-            item['ptdf_differences'].get('plde', None),
-            item['ptdf_differences'].get('plsk', None),
-            item['ptdf_differences'].get('rohu', None),
-            item['ptdf_differences'].get('siat', None),
-            item['ptdf_differences'].get('sihr', None),
-            item['ptdf_differences'].get('sihu', None),
-            item['ptdf_differences'].get('skcz', None),
-            item['ptdf_differences'].get('skhu', None),
-            item['ptdf_differences'].get('skpl', None)
-        ]
-        for item in cnec_data.values()
+def calculate_negative_atc(RAM_0, PTDF_0):
+    """Calculate the final negative ATCs for CNECs with negative RAM."""
+    n_border = len(PTDF_0[0]) if PTDF_0 else 0
+    negative_RAM = []
+    negative_PTDF = []
+
+    for i in range(len(PTDF_0)):
+        if RAM_0[i] < 0:
+            negative_RAM.append(RAM_0[i])
+            negative_PTDF.append([max(0, ptdf) for ptdf in PTDF_0[i]])
+
+    # Borders that no negative-RAM CNEC constrains stay unlimited
+    neg_ATC = [float("inf")] * n_border
+    if not negative_RAM:
+        return neg_ATC
+
+    # Step 1: denominators (sum of squared positive PTDFs per CNEC)
+    deno_list = [sum(ptdf ** 2 for ptdf in neg_ptdf) for neg_ptdf in negative_PTDF]
+
+    # Step 2: most negative ATC per border over all negative-RAM CNECs
+    for i in range(len(negative_PTDF)):
+        if deno_list[i] == 0:
+            continue
+        for j in range(n_border):
+            if negative_PTDF[i][j] > 0:
+                atc = negative_PTDF[i][j] / deno_list[i] * negative_RAM[i]
+                neg_ATC[j] = min(neg_ATC[j], atc)
+
+    # Step 3: scaling factor per CNEC, the final one is the maximum
+    sf_list = []
+    for i in range(len(negative_PTDF)):
+        sf_deno = 0
+        for j in range(n_border):
+            if negative_PTDF[i][j] > 0 and neg_ATC[j] != float("inf"):
+                sf_deno = sf_deno + negative_PTDF[i][j] * neg_ATC[j]
+        if sf_deno != 0:
+            sf_list.append(abs(negative_RAM[i] / sf_deno))
+
+    if not sf_list:
+        return neg_ATC
+
+    final_sf = max(sf_list)
+
+    # Step 4: scale the negative ATCs with the final scaling factor
+    return [atc * final_sf if atc != float("inf") else atc for atc in neg_ATC]
+
+def negative_limiting_cnec(RAM_0, PTDF_0):
+    """Return the row of the negative-RAM CNEC behind calculate_negative_atc per border, -1 where none."""
+    n_border = len(PTDF_0[0]) if PTDF_0 else 0
+    neg_ATC = [float("inf")] * n_border
+    limiting_CNEC = [-1] * n_border
+
+    # The scaling factor is shared by all borders, the most negative candidate of step 2 sets the value
+    for i in range(len(PTDF_0)):
+        if RAM_0[i] >= 0:
+            continue
+        positive_PTDF = [max(0, ptdf) for ptdf in PTDF_0[i]]
+        deno = sum(ptdf ** 2 for ptdf in positive_PTDF)
+        if deno == 0:
+            continue
+        for j in range(n_border):
+            if positive_PTDF[j] > 0 and positive_PTDF[j] / deno * RAM_0[i] < neg_ATC[j]:
+                neg_ATC[j] = positive_PTDF[j] / deno * RAM_0[i]
+                limiting_CNEC[j] = i
+    return limiting_CNEC
+
+def _trace_negative_limiting(trace, atc, negative_ATC, negative_limiting):
+    """Record the negative-RAM CNECs on the borders where they set the final ATC."""
+    timer = PhaseTimer()
+    limiting_CNEC = [
+        int(row) if value == negative != float("inf") else -1
+        for value, negative, row in zip(atc, negative_ATC, negative_limiting)
     ]
-    
-    # Initialize ATC_0 with the correct size (it should match the length of PTDF_0)
-    ATC_0 = [0] * len(PTDF_0)
+    timer.lap("negative_limiting")
+    trace({"iteration": 0, "seconds": timer.seconds, "negative_limiting_cnec": limiting_CNEC})
+
+def _calculate_atc_python(RAM_0, PTDF_0, max_atc, threshold, trace=None):
+    """Run the ATC fixed-point iteration with plain Python lists."""
+    n_border = len(PTDF_0[0]) if PTDF_0 else 0
+    timer = PhaseTimer() if trace else None
+    negative_ATC = calculate_negative_atc(RAM_0, PTDF_0)
+    if timer:
+        timer.lap("negative_ram")
+        trace({"iteration": 0, "seconds": timer.seconds})
+
+    # Positive zone-to-zone PTDFs and the number of borders sharing each CNEC
+    positive_PTDF_final = [[max(0, ptdf) for ptdf in row] for row in PTDF_0]
+    positive_count = [sum(1 for ptdf in row if ptdf > 0) for row in positive_PTDF_final]
+    max_RAM = [max(0, ram) for ram in RAM_0]
+
+    ATC_0 = [0.0] * n_border
+    iteration = 0
     difference = 1
-    while difference > 0.001:
-        # Separate positive and negative RAM and PTDF
-        positive_PTDF_final = []
-        positive_RAM = []
-        negative_RAM = []
-        negative_PTDF = []
-
-        for i in range(len(PTDF_0)):
-            positive_PTDF = [ptdf for ptdf in PTDF_0[i] if ptdf > 0]
-            positive_PTDF_final.append(positive_PTDF)
-            if RAM_0[i] > 0:
-                positive_RAM.append(RAM_0[i])
-            else:
-                negative_RAM.append(RAM_0[i])
-                negative_PTDF.append(PTDF_0[i])
-
-        # Process Negative RAM and PTDF
-        if negative_RAM:
-            deno_list = []
-            for neg_ptdf in negative_PTDF:
-                deno = sum([ptdf ** 2 for ptdf in neg_ptdf])
-                deno_list.append(deno)
-
-            neg_ATC = []
-
-        sf_deno = 0
-        sf_list = []
-        for i in range(0, len(neg_ATC_final)):
-            for j in range(0 , len(neg_ATC_final[i])):
-                sf_deno = sf_deno +  neg_PTDF[i][j] * neg_ATC_final[i][j]
-
-            sf = negative_RAM[i] / sf_deno
-            sf_list.append(sf)
-            sf_deno = 0
-
-            final_sf = max(sf_list)
-            negative_ATC = [min(neg_ATC[i]) * final_sf for i in range(len(neg_ATC))]
-
-            ATC_0 = negative_ATC
+    while difference > threshold:
+        timer = PhaseTimer() if trace else None
 
-        # Process Positive RAM and PTDF
-        max_RAM = [max(0, ram) for ram in RAM_0]
-        ATC_ini_mul = []
+        # Remaining margin after the ATCs of the previous iteration
         RAM_ini = []
-
-        for i in range(0 , len(non_negative_ptdf_2d)):
-            for j in range(0, len(non_negative_ptdf_2d[i])):
-                calc = calc + non_negative_ptdf_2d[i][j] * ATC_0[i]
-            ATC_ini_mul.append(calc)
+        for i in range(len(positive_PTDF_final)):
             calc = 0
-
-        for i in range(0, len(max_RAM)):
-            if max_RAM[i] - ATC_ini_mul[i] < 0 :
-                RAM_ini.append(0)
-
-            else:
-                RAM_ini.append(max_RAM[i] - ATC_ini_mul[i])
-        zero = []
-
-        for i in range(0,len(ATC_0)):
-            zero.append(0)
-        if RAM_ini == zero:
-            break
-
-        ATC_1d = []
-        ATC_2d = []
-        ATC_min = []
-        for i in range(0, len(positive_PTDF_final)):
-            for j in range(0, len(positive_PTDF_final[i])):
-                if RAM_ini[i] == 0 and positive_PTDF_final[i][j] == 0:
-                    ATC_1d.append(0)
-                else:
-                    ATC_1d.append(RAM_ini[i]/positive_PTDF_final[i][j])
-            ATC_2d.append(ATC_1d)
-            ATC_1d = []
-
-        for i in range(0, len(ATC_2d)):
-            ATC_min.append(min(ATC_2d[i]))
-
-        added_ATC = []
-
-        for i in range(0, len(ATC_min)):
-            added_ATC.append(ATC_0[i] + ATC_min[i])
+            for j in range(n_border):
+                calc = calc + positive_PTDF_final[i][j] * ATC_0[j]
+            RAM_ini.append(max(0, max_RAM[i] - calc))
+        if timer:
+            timer.lap("ram_update")
+
+        # Share the margin equally and take the minimum exchange per border
+        ATC_min = [float("inf")] * n_border
+        limiting_CNEC = [-1] * n_border
+        for i in range(len(positive_PTDF_final)):
+            if positive_count[i] == 0:
+                continue
+            share = RAM_ini[i] / positive_count[i]
+            for j in range(n_border):
+                if positive_PTDF_final[i][j] > 0 and share / positive_PTDF_final[i][j] < ATC_min[j]:
+                    ATC_min[j] = share / positive_PTDF_final[i][j]
+                    limiting_CNEC[j] = i
+        if timer:
+            timer.lap("border_min")
 
         limited_ATC = []
-        if max_ATC != 0:
-            for i in range(0, len(added_ATC)):
-                if added_ATC[i] > max_ATC:
-                    limited_ATC.append(max_ATC)
-                else:
-                    limited_ATC.append(added_ATC[i])
-        else:
-            limited_ATC = added_ATC
-
-        sum_of_new_ATC = 0
-        sum_of_old_ATC = 0
-        for i in range(0, len(limited_ATC)):
-            sum_of_new_ATC = sum_of_new_ATC + limited_ATC[i]
-
-        for i in range(0, len(ATC_0)):
-            sum_of_new_ATC = sum_of_new_ATC + ATC_0[i]
-
-        difference = sum_of_new_ATC - sum_of_old_ATC
+        for j in range(n_border):
+            if ATC_min[j] == float("inf"):
+                # No CNEC constrains this border, only the cap applies
+                added_ATC = max_atc if max_atc != 0 else ATC_0[j]
+            else:
+                added_ATC = ATC_0[j] + ATC_min[j]
+            if max_atc != 0 and added_ATC > max_atc:
+                added_ATC = max_atc
+            limited_ATC.append(added_ATC)
+        if timer:
+            timer.lap("clipping")
+
+        difference = sum(limited_ATC) - sum(ATC_0)
         ATC_0 = limited_ATC
-        RAM_0 = RAM_ini
+        iteration += 1
+
+        if trace:
+            trace({
+                "iteration": iteration,
+                "seconds": timer.seconds,
+                "atc_change": difference,
+                "limiting_cnec": limiting_CNEC,
+            })
+
+    ATC_final = [min(ATC_0[j], negative_ATC[j]) for j in range(n_border)]
+    if trace:
+        _trace_negative_limiting(trace, ATC_final, negative_ATC, negative_limiting_cnec(RAM_0, PTDF_0))
+    return ATC_final
+
+def build_atc_inputs(cnec_data, region=None):
+    """Build the RAM list and the CNEC x border PTDF rows from processed CNEC data."""
+    borders = (region or topology.CORE).borders
+    RAM_0 = [item['ram'] for item in cnec_data.values()]
 
-    return ATC_0
+    PTDF_0 = [
+        [item['ptdf_differences'].get(border, 0) for border in borders]
+        for item in cnec_data.values()
+    ]
 
-def main():
-    """Main function to fetch and process CNEC data."""
-    logger.info("Fetching Final Computation data...")
-    cnec_raw_data = fetch_data_from_jao(FINAL_COMPUTATION_URL)
-    
-    if not cnec_raw_data:
-        logger.error("Failed to fetch CNEC data . Exiting...")
-        return
-    
-    logger.info("Processing CNEC data...")
-    processed_cnec_data = process_cnec_data(cnec_raw_data)
+    return RAM_0, PTDF_0
+
+def _original_rows_trace(trace, index):
+    """Wrap trace so limiting CNEC indices refer to the rows before presolve."""
+    def mapped(record):
+        for key in ("limiting_cnec", "negative_limiting_cnec"):
+            if key in record:
+                record = dict(record, **{key: [index[i] if i >= 0 else i for i in record[key]]})
+        trace(record)
+    return mapped
+
+def solve_atc_inputs(RAM_0, PTDF_0, engine=ENGINE, max_atc=MAX_ATC, threshold=CONVERGENCE_THRESHOLD, trace=None,
+                     presolve=PRESOLVE, min_ptdf=MIN_PTDF, accelerate=ACCELERATE, region=None):
+    """Calculate the ATC per border from RAM and PTDF rows with the chosen engine.
+
+    trace, if given, receives one record per iteration, see atc_trace.AtcTrace.
+    With presolve, duplicate and dominated CNECs are dropped first; limiting
+    CNEC indices in the trace still refer to the input rows. Positive PTDFs
+    below min_ptdf are treated as zero by every engine. accelerate switches
+    the numpy engine to atc_numpy.iterate_atc_accelerated and raises
+    ValueError with any other engine. region is the
+    topology.Region of the PTDF columns, Core by default, and tells the
+    paired engine which columns are the two directions of one border.
+    """
+    if accelerate and engine != "numpy":
+        raise ValueError(f"accelerate is only supported by the numpy engine, not {engine}")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown ATC engine: {engine}")
+
+    # Before presolve, so its dominance check sees the PTDFs the engine uses
+    if min_ptdf and engine == "python":
+        if hasattr(PTDF_0, "tolist"):
+            PTDF_0 = PTDF_0.tolist()
+        PTDF_0 = [[0 if 0 < ptdf < min_ptdf else ptdf for ptdf in row] for row in PTDF_0]
+    elif min_ptdf and (presolve or engine != "sparse"):
+        # Without presolve the sparse engine drops them while building its CSR, without a dense copy
+        import atc_numpy
+        RAM_0, PTDF_0 = atc_numpy.as_matrices(RAM_0, PTDF_0)
+        PTDF_0 = PTDF_0 * ~((PTDF_0 > 0) & (PTDF_0 < min_ptdf))
+
+    if presolve:
+        import presolve as presolve_stage
+        RAM_0, PTDF_0, index = presolve_stage.presolve(RAM_0, PTDF_0)
+        if trace:
+            trace = _original_rows_trace(trace, index.tolist())
+
+    if engine == "python":
+        if hasattr(RAM_0, "tolist"):
+            RAM_0 = RAM_0.tolist()
+        if hasattr(PTDF_0, "tolist"):
+            PTDF_0 = PTDF_0.tolist()
+        return _calculate_atc_python(RAM_0, PTDF_0, max_atc, threshold, trace)
+
+    import atc_numpy
+    RAM_0, PTDF_0 = atc_numpy.as_matrices(RAM_0, PTDF_0)
+
+    timer = PhaseTimer() if trace else None
+    negative_ATC = atc_numpy.negative_atc(RAM_0, PTDF_0, min_ptdf=min_ptdf)
+    if timer:
+        timer.lap("negative_ram")
+        trace({"iteration": 0, "seconds": timer.seconds})
+
+    if engine == "numpy":
+        atc = atc_numpy.solve_atc(RAM_0, PTDF_0, max_atc, threshold, negative_ATC, trace, accelerate)
+    elif engine == "numba":
+        import atc_numba
+        atc = atc_numba.solve_atc_numba(RAM_0, PTDF_0, max_atc, threshold, negative_ATC, trace)
+    elif engine == "sparse":
+        import atc_sparse
+        atc = atc_sparse.solve_atc_sparse(RAM_0, PTDF_0, max_atc, threshold, negative_ATC, min_ptdf, trace)
+    else:
+        import atc_paired
+        region = region or topology.CORE
+        atc = atc_paired.solve_atc_paired(RAM_0, PTDF_0, region.forward, region.backward, max_atc, threshold,
+                                          negative_ATC, trace)
+    if trace:
+        _trace_negative_limiting(trace, atc.tolist(), negative_ATC.tolist(),
+                                 atc_numpy.negative_limiting(RAM_0, PTDF_0, min_ptdf).tolist())
+    return atc.tolist()
+
+def calculate_atc(cnec_data, engine=ENGINE, max_atc=MAX_ATC, threshold=CONVERGENCE_THRESHOLD, trace=None):
+    """Calculate the ATC per border with the "python", "numpy", "numba", "sparse" or "paired" engine."""
+    RAM_0, PTDF_0 = build_atc_inputs(cnec_data)
+    return solve_atc_inputs(RAM_0, PTDF_0, engine, max_atc, threshold, trace)
+
+def region_url(region=None):
+    """Return the final computation endpoint of a region, FINAL_URL for Core."""
+    if region is None or region is topology.CORE:
+        return FINAL_URL
+    if not region.endpoint:
+        raise ValueError(f"No JAO endpoint configured for region {region.name}")
+    return region.endpoint
+
+def stream_atc_inputs(from_utc, to_utc, region=None, with_cnecs=False):
+    """Stream one window from JAO straight into the RAM vector and PTDF matrix.
+
+    with_cnecs adds the cnec_table.CnecTable of the rows to the result.
+    """
+    import requests
+
+    import jao_client
+
+    url = region_url(region)
+    region = region or topology.CORE
+    try:
+        ram, zonal_ptdf, cnecs = jao_client.stream_cnec_arrays(
+            url, from_utc, to_utc, region.zones, PARAMS_FINAL["Filter"], with_cnecs=True
+        )
+    except requests.exceptions.RequestException as err:
+        logger.error(f"Error fetching data: {err}")
+        return None
+    if with_cnecs:
+        return ram, region.border_ptdf(zonal_ptdf), cnecs
+    return ram, region.border_ptdf(zonal_ptdf)
+
+def load_atc_inputs(from_utc, to_utc, use_cache=USE_CACHE, stream=STREAM, region=None, with_cnecs=False):
+    """Return (RAM, PTDF) for one window, from the local cache when possible.
+
+    region is a topology.Region, Core by default. with_cnecs returns
+    (RAM, PTDF, CnecTable) with the identity of every row, see cnec_table.
+    """
+    from cnec_table import CnecTable
+
+    url = region_url(region)
+    borders = (region or topology.CORE).borders
+    cache = None
+    if use_cache:
+        import jao_cache
+        cache = jao_cache.get_cache(CACHE_DIR)
+        raw_key = cache.key(url, PARAMS_FINAL["Filter"], from_utc, to_utc)
+        # Processed inputs depend on the border list as well
+        key = cache.key(url, PARAMS_FINAL["Filter"] + ",".join(borders), from_utc, to_utc)
+        inputs = cache.get_inputs(key, to_utc, with_cnecs)
+        if inputs is not None:
+            logger.info("Loaded processed CNEC data from cache")
+            return inputs
+
+    if stream:
+        logger.info("Streaming Final Computation data...")
+        inputs = stream_atc_inputs(from_utc, to_utc, region, with_cnecs=True)
+        if cache and inputs is not None:
+            cache.put_inputs(key, *inputs)
+        return inputs if inputs is None or with_cnecs else inputs[:2]
+
+    cnec_raw_data = cache.get_raw(raw_key, to_utc) if cache else None
+    if cnec_raw_data is None:
+        logger.info("Fetching Final Computation data...")
+        params = dict(PARAMS_FINAL, FromUtc=from_utc, ToUtc=to_utc)
+        cnec_raw_data = fetch_data_from_jao(f"{url}?{urlencode(params)}")
+        if not cnec_raw_data:
+            return None
+        if cache:
+            cache.put_raw(raw_key, cnec_raw_data)
 
-    logger.info("Calculating ATC values...")
-    atc_results = calculate_atc(processed_cnec_data)
+    logger.info("Processing CNEC data...")
+    processed_cnec_data = process_cnec_data(cnec_raw_data, region)
+    inputs = build_atc_inputs(processed_cnec_data, region)
+    cnecs = CnecTable.from_records(cnec_raw_data.get("data", []))
+    if cache:
+        cache.put_inputs(key, *inputs, cnecs)
+    return (*inputs, cnecs) if with_cnecs else inputs
+
+def solve_range(from_utc, to_utc, engine=ENGINE, writer=None, accelerate=ACCELERATE):
+    """Load and solve every hourly MTU between from_utc and to_utc.
+
+    Returns {mtu_utc: {border: ATC}}, MTUs that could not be fetched are
+    left out. writer, if given, is an atc_output.AtcWriter fed per MTU with
+    the JAO ids of the limiting CNECs.
+    """
+    import jao_client
+
+    results = {}
+    for mtu_from, mtu_to in jao_client.split_hours(from_utc, to_utc):
+        inputs = load_atc_inputs(mtu_from, mtu_to, with_cnecs=True)
+        if inputs is None:
+            logger.error(f"Failed to fetch CNEC data for {mtu_from}")
+            continue
+
+        logger.info(f"Calculating ATC values for {mtu_from}...")
+        RAM_0, PTDF_0, cnecs = inputs
+        trace = AtcTrace()
+        atc = solve_atc_inputs(RAM_0, PTDF_0, engine, trace=trace, accelerate=accelerate)
+        results[mtu_from] = dict(zip(topology.BORDERS, atc))
+        if writer:
+            limiting = trace.limiting_cnec
+            writer.add(mtu_from, atc, None if limiting is None else cnecs.ids(limiting), trace.iterations)
+    return results
+
+def main(argv=None):
+    """Fetch, process and solve the requested MTUs and save the ATCs."""
+    parser = argparse.ArgumentParser(description="Extract ATCs per border from the JAO Core ID final computation.")
+    parser.add_argument("--from", dest="from_utc", default=FROM_UTC, help="start, e.g. 2025-02-20T00:00:00.000Z")
+    parser.add_argument("--to", dest="to_utc", default=TO_UTC, help="end (exclusive)")
+    parser.add_argument("--engine", default=ENGINE, choices=ENGINES)
+    parser.add_argument("--accelerate", action="store_true", default=ACCELERATE,
+                        help="extrapolate slow iteration tails (numpy engine)")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="JSON file with the ATCs per MTU and border")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="columnar output partitioned by date, '' to skip")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+    if args.accelerate and args.engine != "numpy":
+        parser.error(f"--accelerate needs --engine numpy, not {args.engine}")
+
+    logging.basicConfig(level=args.log_level)
+
+    if args.output_dir:
+        import atc_output
+        with atc_output.AtcWriter(args.output_dir, OUTPUT_FORMAT) as writer:
+            atc_results = solve_range(args.from_utc, args.to_utc, args.engine, writer, args.accelerate)
+    else:
+        atc_results = solve_range(args.from_utc, args.to_utc, args.engine, accelerate=args.accelerate)
+
+    if not atc_results:
+        logger.error("Failed to fetch CNEC data . Exiting...")
+        return 1
 
     # Save the ATC results to a JSON file
-    output_file = "atc_results.json"
     try:
-        with open(output_file, "w") as json_file:
+        with open(args.output, "w") as json_file:
             json.dump(atc_results, json_file, indent=4)
-        logger.info(f"ATC results saved to {output_file}")
+        logger.info(f"ATC results saved to {args.output}")
     except IOError as e:
         logger.error(f"Error saving ATC results to file: {e}")
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    main()
-
-
-
-
-
-
-    
\ No newline at end of file
+    raise SystemExit(main())
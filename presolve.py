@@ -0,0 +1,75 @@
+import numpy as np
+
+from atc_numpy import as_matrices
+
+# Define constants and configurations
+DECIMALS = 5  # JAO publishes PTDFs with 5 decimals
+MAX_CANDIDATES = 256  # rows every CNEC is checked against for dominance
+BLOCK_SIZE = 256  # CNECs compared against the candidates at once
+
+
+def deduplicate(ram, ptdf, decimals=DECIMALS):
+    """Keep one row per quantised PTDF vector, the one with the lowest RAM.
+
+    Returns the indices of the kept rows in their original order.
+    """
+    if not len(ram):
+        return np.arange(0)
+    quantised = np.round(ptdf, decimals) + 0.0  # + 0.0 folds -0.0 into 0.0
+    # Sort by RAM first so the first row of every duplicate group is the tightest
+    order = np.argsort(ram, kind="stable")
+    _, first = np.unique(quantised[order], axis=0, return_index=True)
+    return np.sort(order[first])
+
+
+def dominated(ram, ptdf, max_candidates=MAX_CANDIDATES):
+    """Flag positive-RAM rows whose constraint is implied by another row for ATC >= 0.
+
+    Row k is dominated by row i when pPTDF_k / RAM_k <= pPTDF_i / RAM_i on
+    every border. Such a row can never be the strict minimum of the
+    equal-sharing step either, so dropping it leaves the ATCs unchanged.
+    Each row is only checked against the rows with the largest normalised
+    sensitivities and the row maximising each border, so the check is
+    sound but not exhaustive.
+    """
+    n_cnec = len(ram)
+    flags = np.zeros(n_cnec, dtype=bool)
+    candidates_mask = ram > 0
+    if not candidates_mask.any():
+        return flags
+
+    positive_ptdf = np.maximum(ptdf, 0)
+    normalised = np.zeros_like(positive_ptdf)
+    normalised[candidates_mask] = positive_ptdf[candidates_mask] / ram[candidates_mask, None]
+    # Rows without any positive PTDF never bind a border
+    flags[candidates_mask & ~(positive_ptdf > 0).any(axis=1)] = True
+
+    eligible = np.flatnonzero(candidates_mask & ~flags)
+    strength = normalised[eligible].sum(axis=1)
+    top = eligible[np.argsort(-strength, kind="stable")[:max_candidates]]
+    candidates = np.union1d(top, eligible[normalised[eligible].argmax(axis=0)])
+    candidate_rows = normalised[candidates]
+
+    for start in range(0, len(eligible), BLOCK_SIZE):
+        block = eligible[start:start + BLOCK_SIZE]
+        rows = normalised[block][:, None, :]
+        covers = (candidate_rows >= rows).all(axis=2)
+        # Equal rows: the lower index wins so exactly one of them is kept
+        beats = covers & ((candidate_rows > rows).any(axis=2) | (candidates < block[:, None]))
+        beats &= candidates != block[:, None]
+        flags[block] = beats.any(axis=1)
+    return flags
+
+
+def presolve(RAM_0, PTDF_0, decimals=DECIMALS, max_candidates=MAX_CANDIDATES):
+    """Drop duplicate and dominated CNECs before solving.
+
+    Rows with non-positive RAM are always kept because the negative-RAM
+    pass needs them. Returns (ram, ptdf, index) where index maps every
+    kept row to its row in the input, e.g. for reporting CNEC IDs.
+    """
+    ram, ptdf = as_matrices(RAM_0, PTDF_0)
+    kept = deduplicate(ram, ptdf, decimals)
+    kept = np.union1d(kept, np.flatnonzero(ram <= 0))
+    kept = kept[~dominated(ram[kept], ptdf[kept], max_candidates)]
+    return ram[kept], ptdf[kept], kept
@@ -0,0 +1,141 @@
+"""Sensitivity scenarios for one MTU solved on a process pool.
+
+The RAM vector and PTDF matrix are copied once into shared memory and the
+worker processes attach to them by name, so only the small scenario
+parameter sets are pickled. Workers write their ATCs straight into a
+shared (n_scenario, n_border) result array.
+
+A scenario is a dict with any of the keys
+    ram_scale  factor applied to the RAM, a scalar or one value per CNEC
+    max_atc    ATC cap in MW, 0 for none
+    threshold  convergence threshold in MW
+    removed    rows of the CNECs left out of the scenario
+"""
+import argparse
+import csv
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import atc_numpy
+
+# Define constants and configurations
+WORKERS = os.cpu_count() or 1
+CHUNK_SIZE = 8  # scenarios sent to a worker at once
+OUTPUT_FILE = "atc_scenarios.csv"
+
+logger = logging.getLogger(__name__)
+
+# Arrays attached by each worker process, see _attach
+_shared = {}
+
+
+def _create(array):
+    """Copy array into a new shared memory block, return the block and its view."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    view[...] = array
+    return block, view
+
+
+def _attach(specs):
+    """Map the shared arrays into this worker process, specs is {name: (block, shape)}."""
+    for name, (block_name, shape) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _shared[name] = (block, np.ndarray(shape, dtype=np.float64, buffer=block.buf))
+
+
+def _solve(index, scenario, max_atc, threshold):
+    """Solve one scenario against the shared arrays and store its ATCs."""
+    ram = _shared["ram"][1] * scenario.get("ram_scale", 1.0)
+    ptdf = _shared["ptdf"][1]
+    if scenario.get("removed"):
+        kept = np.ones(len(ram), dtype=bool)
+        kept[list(scenario["removed"])] = False
+        ram, ptdf = ram[kept], ptdf[kept]
+
+    max_atc = scenario.get("max_atc", max_atc)
+    threshold = scenario.get("threshold", threshold)
+    _shared["atc"][1][index] = atc_numpy.solve_atc(ram, ptdf, max_atc, threshold, atc_numpy.negative_atc(ram, ptdf))
+    return index
+
+
+def _solve_chunk(chunk, max_atc, threshold):
+    return [_solve(index, scenario, max_atc, threshold) for index, scenario in chunk]
+
+
+def run_scenarios(RAM_0, PTDF_0, scenarios, workers=WORKERS, max_atc=0, threshold=0.001):
+    """Solve every scenario of one MTU and return an (n_scenario, n_border) ATC array.
+
+    max_atc and threshold apply to scenarios that do not set their own.
+    """
+    ram, ptdf = atc_numpy.as_matrices(RAM_0, PTDF_0)
+    n_border = ptdf.shape[1]
+    blocks = {}
+    try:
+        for name, array in (("ram", ram), ("ptdf", ptdf), ("atc", np.full((len(scenarios), n_border), np.nan))):
+            blocks[name] = _create(array)
+        specs = {name: (block.name, view.shape) for name, (block, view) in blocks.items()}
+
+        indexed = list(enumerate(scenarios))
+        chunks = [indexed[start:start + CHUNK_SIZE] for start in range(0, len(indexed), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as executor:
+            for _ in executor.map(_solve_chunk, chunks, itertools.repeat(max_atc), itertools.repeat(threshold)):
+                pass
+        return blocks["atc"][1].copy()
+    finally:
+        # Drop the views before closing, a block with exported buffers cannot be closed
+        opened = [block for block, _ in blocks.values()]
+        blocks.clear()
+        for block in opened:
+            block.close()
+            block.unlink()
+
+
+def grid(ram_scales=(1.0,), max_atcs=(0,), thresholds=(0.001,)):
+    """Return the scenarios of every combination of RAM scale, cap and threshold."""
+    return [
+        {"ram_scale": ram_scale, "max_atc": max_atc, "threshold": threshold}
+        for ram_scale, max_atc, threshold in itertools.product(ram_scales, max_atcs, thresholds)
+    ]
+
+
+def main():
+    import main as atc_main
+    import topology
+
+    parser = argparse.ArgumentParser(description="Run a sensitivity sweep of ATCs for one MTU.")
+    parser.add_argument("--from", dest="from_utc", default=atc_main.FROM_UTC)
+    parser.add_argument("--to", dest="to_utc", default=atc_main.TO_UTC)
+    parser.add_argument("--ram-scale", default="1.0", help="comma separated RAM factors, e.g. 0.8,0.9,1.0")
+    parser.add_argument("--max-atc", default="0", help="comma separated ATC caps in MW, 0 for none")
+    parser.add_argument("--threshold", default=str(atc_main.CONVERGENCE_THRESHOLD), help="comma separated MW")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    inputs = atc_main.load_atc_inputs(args.from_utc, args.to_utc)
+    if inputs is None:
+        raise SystemExit(1)
+
+    scenarios = grid(
+        [float(value) for value in args.ram_scale.split(",")],
+        [float(value) for value in args.max_atc.split(",")],
+        [float(value) for value in args.threshold.split(",")],
+    )
+    atc = run_scenarios(*inputs, scenarios, args.workers)
+    with open(args.output, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["ram_scale", "max_atc", "threshold"] + topology.BORDERS)
+        for scenario, row in zip(scenarios, atc.tolist()):
+            writer.writerow([scenario["ram_scale"], scenario["max_atc"], scenario["threshold"]] + row)
+    logger.info(f"Saved {len(scenarios)} scenarios to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Resident ATC service keeping a rolling window of MTUs in memory.
+
+A background task fetches new MTUs from JAO on a schedule, solves them
+and stores the ATCs per border. In polling mode every MTU of the window is
+checked again on each refresh with conditional requests and re-solved only
+when its RAM and PTDFs changed, keeping the previous ATCs when only RAMs
+changed that cannot alter the result. A small HTTP API answers queries from
+memory, e.g.
+
+    GET /atc?border=DE-FR&hours=8
+    GET /atc?border=defr&from=2025-02-20T00:00:00.000Z&hours=24
+    GET /mtus
+    GET /health
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import time
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+
+import atc_numpy
+import jao_client
+from topology import BORDER_INDEX, CORE
+
+# Define constants and configurations
+HOST = "127.0.0.1"
+PORT = 8080
+FINAL_URL = CORE.endpoint  # see topology.json
+INITIAL_URL = FINAL_URL.replace("IDCCB_finalComputation", "IDCCB_initialComputation")
+PAST_HOURS = 24
+FUTURE_HOURS = 48
+REFRESH_SECONDS = 300
+MAX_FETCHES = 8  # concurrent JAO requests per refresh
+ENGINE = "numpy"
+POLL = False  # re-check MTUs already in memory and re-solve the changed ones
+
+logger = logging.getLogger(__name__)
+
+
+def parse_border(value):
+    """Accept DE-FR, DE>FR, DEFR or defr and return the canonical border name."""
+    border = value.lower().replace("-", "").replace(">", "").replace("_", "")
+    if border not in BORDER_INDEX:
+        raise ValueError(f"Unknown border: {value}")
+    return border
+
+
+def floor_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def fingerprint(ram, ptdf):
+    """Return a digest of the solver inputs of one MTU."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(ram.tobytes())
+    digest.update(ptdf.tobytes())
+    return digest.hexdigest()
+
+
+class MtuStore:
+    """In-memory ATCs and CNEC matrices per MTU, keyed by the MTU start in UTC."""
+
+    def __init__(self):
+        self.mtus = {}
+
+    def put(self, mtu_utc, ram, ptdf, atc, validators=None, fingerprint=None, state=None):
+        self.mtus[mtu_utc] = {
+            "ram": ram,
+            "ptdf": ptdf,
+            "atc": atc,
+            "updated": time.time(),
+            "validators": validators,
+            "fingerprint": fingerprint,
+            "state": state,
+        }
+
+    def __contains__(self, mtu_utc):
+        return mtu_utc in self.mtus
+
+    def evict_before(self, mtu_utc):
+        """Drop every MTU starting before mtu_utc."""
+        for key in [key for key in self.mtus if jao_client.parse_utc(key) < mtu_utc]:
+            del self.mtus[key]
+
+    def query(self, border, start, hours):
+        """Return [(mtu_utc, atc)] for one border over consecutive hours, skipping missing MTUs."""
+        column = BORDER_INDEX[border]
+        rows = []
+        for hour in range(hours):
+            mtu_utc = jao_client.format_utc(start + datetime.timedelta(hours=hour))
+            entry = self.mtus.get(mtu_utc)
+            if entry is not None:
+                rows.append((mtu_utc, entry["atc"][column]))
+        return rows
+
+
+class AtcService:
+    """Refresh MTUs from JAO in the background and serve ATC queries over HTTP."""
+
+    def __init__(self, url=FINAL_URL, past_hours=PAST_HOURS, future_hours=FUTURE_HOURS,
+                 refresh_seconds=REFRESH_SECONDS, engine=ENGINE, clock=None, poll=POLL):
+        self.url = url
+        self.past_hours = past_hours
+        self.future_hours = future_hours
+        self.refresh_seconds = refresh_seconds
+        self.engine = engine
+        self.poll = poll
+        self.clock = clock or (lambda: datetime.datetime.now(datetime.timezone.utc))
+        self.store = MtuStore()
+        self.last_refresh = None
+
+    def window(self):
+        """Return the (FromUtc, ToUtc) MTU windows of the rolling window."""
+        now = floor_hour(self.clock())
+        start = now - datetime.timedelta(hours=self.past_hours)
+        end = now + datetime.timedelta(hours=self.future_hours)
+        return start, jao_client.split_hours(jao_client.format_utc(start), jao_client.format_utc(end))
+
+    def load_mtu(self, from_utc, to_utc):
+        """Fetch and solve one MTU, blocking; returns False when JAO has no data yet."""
+        import main
+
+        ram, zonal_ptdf = jao_client.stream_cnec_arrays(self.url, from_utc, to_utc, CORE.zones)
+        if not len(ram):
+            return False
+        ptdf = CORE.border_ptdf(zonal_ptdf)
+        atc = main.solve_atc_inputs(ram, ptdf, self.engine)
+        self.store.put(from_utc, ram, ptdf, atc)
+        return True
+
+    def poll_mtu(self, from_utc, to_utc):
+        """Fetch one MTU if JAO changed it and re-solve it if its inputs changed, blocking.
+
+        With the numpy engine the atc_numpy.AtcState of the MTU is kept, and
+        when only RAMs changed atc_numpy.reuse_atc keeps the ATCs or solves
+        from zero. Returns True when the ATCs were updated.
+        """
+        import main
+
+        entry = self.store.mtus.get(from_utc)
+        data, validators = jao_client.fetch_if_changed(self.url, from_utc, to_utc, entry and entry["validators"])
+        if data is None:
+            return False
+
+        cnec_arrays = jao_client.CnecArrays(CORE.zones)
+        for record in data["data"]:
+            cnec_arrays.append(record)
+        ram, zonal_ptdf = cnec_arrays.arrays()
+        if not len(ram):
+            return False
+        ptdf = CORE.border_ptdf(zonal_ptdf)
+        digest = fingerprint(ram, ptdf)
+        if entry is not None and entry["fingerprint"] == digest:
+            # New payload, same RAM and PTDFs: keep the ATCs
+            entry["validators"] = validators
+            return False
+        state = entry and entry["state"]
+        if self.engine != "numpy" or main.PRESOLVE or main.MIN_PTDF:
+            atc, state = main.solve_atc_inputs(ram, ptdf, self.engine), None
+        elif state is not None and state.ptdf.shape == ptdf.shape and np.array_equal(state.ptdf, ptdf):
+            # Only RAMs changed: keep the previous ATCs if they provably equal a cold solve
+            rows = np.flatnonzero(ram != state.ram)
+            state = atc_numpy.reuse_atc(state, changed=dict(zip(rows.tolist(), ram[rows].tolist())))
+            atc = state.final_atc.tolist()
+            logger.debug(f"{'Reused' if state.iterations == 0 else 'Re-solved'} {from_utc} after {len(rows)} RAM changes")
+        else:
+            state = atc_numpy.solve_atc_state(ram, ptdf, main.MAX_ATC, main.CONVERGENCE_THRESHOLD,
+                                              atc_numpy.negative_atc(ram, ptdf), accelerate=main.ACCELERATE)
+            atc = state.final_atc.tolist()
+        self.store.put(from_utc, ram, ptdf, atc, validators, digest, state)
+        return True
+
+    async def refresh(self):
+        """Load every MTU of the rolling window that is not in memory yet.
+
+        In polling mode every MTU of the window is checked and the changed
+        ones are re-solved. Returns the number of MTUs solved.
+        """
+        start, windows = self.window()
+        self.store.evict_before(start)
+        if self.poll:
+            targets, load_mtu = windows, self.poll_mtu
+        else:
+            targets, load_mtu = [window for window in windows if window[0] not in self.store], self.load_mtu
+        semaphore = asyncio.Semaphore(MAX_FETCHES)
+
+        async def load(window):
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(load_mtu, *window)
+                except requests.exceptions.RequestException as err:
+                    logger.error(f"Error fetching {window[0]}: {err}")
+                    return False
+                except Exception:
+                    # A bad payload or solver error must not stop the other MTUs or the refresher
+                    logger.exception(f"Failed to solve {window[0]}, it will be retried on the next refresh")
+                    return False
+
+        loaded = await asyncio.gather(*(load(window) for window in targets))
+        self.last_refresh = time.time()
+        logger.info(f"Refreshed {sum(loaded)} of {len(targets)} {'polled' if self.poll else 'missing'} MTUs")
+        return sum(loaded)
+
+    async def refresh_forever(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_seconds)
+
+    def answer(self, path):
+        """Return (status, body) for one GET request path."""
+        parsed = urlparse(path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        try:
+            if parsed.path == "/health":
+                return 200, {"mtus": len(self.store.mtus), "last_refresh": self.last_refresh}
+            if parsed.path == "/mtus":
+                return 200, sorted(self.store.mtus)
+            if parsed.path == "/atc":
+                border = parse_border(query["border"])
+                start = jao_client.parse_utc(query["from"]) if "from" in query else floor_hour(self.clock())
+                hours = int(query.get("hours", 1))
+                # Nothing outside the rolling window is kept, and the loop runs on the event loop
+                max_hours = self.past_hours + self.future_hours
+                if not 1 <= hours <= max_hours:
+                    raise ValueError(f"hours must be between 1 and {max_hours}")
+                rows = self.store.query(border, start, hours)
+                return 200, {"border": border, "atc": [{"mtu_utc": mtu, "atc_mw": atc} for mtu, atc in rows]}
+        except (KeyError, ValueError) as err:
+            return 400, {"error": str(err)}
+        return 404, {"error": f"Unknown path: {parsed.path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                status, body = 405, {"error": "Only GET is supported"}
+            else:
+                status, body = self.answer(parts[1])
+            payload = json.dumps(body).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        """Start the refresher and the HTTP server and run until cancelled."""
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info(f"Serving ATCs on http://{host}:{port}")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.refresh_forever())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ATCs for a rolling window of MTUs.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--url", default=FINAL_URL, help="JAO endpoint to poll")
+    parser.add_argument("--past-hours", type=int, default=PAST_HOURS)
+    parser.add_argument("--future-hours", type=int, default=FUTURE_HOURS)
+    parser.add_argument("--refresh", type=int, default=REFRESH_SECONDS, help="seconds between refreshes")
+    parser.add_argument("--engine", default=ENGINE)
+    parser.add_argument("--poll", action="store_true", default=POLL,
+                        help="re-check every MTU on each refresh and re-solve the changed ones")
+    parser.add_argument("--initial", dest="url", action="store_const", const=INITIAL_URL,
+                        help="poll the initial computation instead of the final one")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    service = AtcService(args.url, args.past_hours, args.future_hours, args.refresh, args.engine, poll=args.poll)
+    asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
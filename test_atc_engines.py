@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+import atc_numba
+import bench
+import main
+from topology import border_ptdf
+
+OPTIONS = [
+    {},
+    {"max_atc": 500},
+    {"min_ptdf": 0.05},
+    {"presolve": True},
+    {"presolve": True, "min_ptdf": 0.05, "max_atc": 800},
+]
+# (seed, share of CNECs with negative RAM) of the synthetic MTUs
+SYNTHETIC = [(1, 0), (2, 0.02), (3, 0.05)]
+# The accelerated iteration extrapolates to the limit the plain one stops short of
+ACCELERATE_TOLERANCE = 0.05  # MW
+
+
+@pytest.fixture(params=main.ENGINES)
+def engine(request, monkeypatch):
+    # Without Numba, run its kernel uncompiled instead of falling back to the numpy engine
+    if request.param == "numba" and atc_numba.numba is None:
+        monkeypatch.setattr(atc_numba, "numba", True)
+    return request.param
+
+
+def fixture_inputs():
+    with open(os.path.join(os.path.dirname(__file__), "cnec_data.json")) as file:
+        cnec_data = {int(key): value for key, value in json.load(file).items()}
+    return main.build_atc_inputs(cnec_data)
+
+
+def synthetic_inputs(seed, negative_share):
+    ram, zonal = bench.make_mtu(300, seed, negative_share)
+    return ram, border_ptdf(zonal)
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_engines_match_python_on_fixture(engine, options):
+    RAM_0, PTDF_0 = fixture_inputs()
+    expected = main.solve_atc_inputs(RAM_0, PTDF_0, "python", **options)
+    assert main.solve_atc_inputs(RAM_0, PTDF_0, engine, **options) == pytest.approx(expected, abs=1e-9)
+
+
+@pytest.mark.parametrize("seed, negative_share", SYNTHETIC)
+@pytest.mark.parametrize("options", OPTIONS)
+def test_engines_match_python_on_synthetic_mtus(engine, seed, negative_share, options):
+    ram, ptdf = synthetic_inputs(seed, negative_share)
+    expected = main.solve_atc_inputs(ram, ptdf, "python", **options)
+    assert main.solve_atc_inputs(ram, ptdf, engine, **options) == pytest.approx(expected, abs=1e-9)
+
+
+@pytest.mark.parametrize("seed, negative_share", SYNTHETIC)
+@pytest.mark.parametrize("options", OPTIONS)
+def test_accelerate_matches_python(seed, negative_share, options):
+    ram, ptdf = synthetic_inputs(seed, negative_share)
+    expected = main.solve_atc_inputs(ram, ptdf, "python", **options)
+    atc = main.solve_atc_inputs(ram, ptdf, "numpy", accelerate=True, **options)
+    assert atc == pytest.approx(expected, abs=ACCELERATE_TOLERANCE)
+
+
+def test_synthetic_mtus_cover_negative_ram_and_binding_borders():
+    # Guards the cases above against degenerate MTUs where every ATC is zero
+    for seed, negative_share in SYNTHETIC:
+        ram, ptdf = synthetic_inputs(seed, negative_share)
+        assert (ram < 0).any() == (negative_share > 0)
+        assert max(main.solve_atc_inputs(ram, ptdf, "python", min_ptdf=0.05)) > 0
+
+
+def test_min_ptdf_applies_before_presolve(engine):
+    if engine == "paired":
+        pytest.skip("the paired engine needs the Core border columns")
+    # Row 1 is dominated by row 0 only through the 0.02 PTDF that min_ptdf drops
+    RAM_0, PTDF_0 = [100, 1000], [[0.02, 0.5], [0.1, 0.6]]
+    expected = main.solve_atc_inputs(RAM_0, PTDF_0, "python", min_ptdf=0.05)
+    atc = main.solve_atc_inputs(RAM_0, PTDF_0, engine, min_ptdf=0.05, presolve=True)
+    assert atc == pytest.approx(expected)
+    assert atc[0] > 0
@@ -0,0 +1,17 @@
+import pytest
+
+import bench
+import main
+from atc_trace import AtcTrace
+from topology import border_ptdf
+
+
+def test_run_case_counts_each_engines_iterations():
+    results = bench.run_case(100, 1, repeats=1)
+    ram, zonal = bench.make_mtu(100, bench.SEED)
+    ptdf = border_ptdf(zonal)
+    for name, solve in bench.engine_solvers([(ram, ptdf)]).items():
+        trace = AtcTrace()
+        solve(ram, ptdf, trace)
+        assert results[name]["iterations"] == trace.iterations > 0
+        assert results[name]["atc_sum"] == pytest.approx(sum(main.solve_atc_inputs(ram, ptdf, "python")))
@@ -0,0 +1,24 @@
+import jao_cache
+import main
+
+
+def test_load_atc_inputs_walks_the_cache_once(tmp_path, monkeypatch):
+    root = str(tmp_path / "cache")
+    monkeypatch.setattr(main, "CACHE_DIR", root)
+    monkeypatch.setattr(jao_cache, "_caches", {})
+    inputs = main.build_atc_inputs({0: {"ram": 100.0, "ptdf_differences": {"atde": 0.1}}})
+    monkeypatch.setattr(main, "fetch_data_from_jao", lambda url: {"data": []})
+    monkeypatch.setattr(main, "process_cnec_data", lambda data, region=None: {})
+    monkeypatch.setattr(main, "build_atc_inputs", lambda data, region=None: inputs)
+    walks = []
+    evict = jao_cache.JaoCache.evict
+    monkeypatch.setattr(jao_cache.JaoCache, "evict", lambda self: walks.append(self) or evict(self))
+
+    for hour in range(5):
+        from_utc = f"2025-02-20T{hour:02d}:00:00.000Z"
+        to_utc = f"2025-02-20T{hour + 1:02d}:00:00.000Z"
+        assert main.load_atc_inputs(from_utc, to_utc) == inputs
+    assert len(walks) == 1
+    assert jao_cache.get_cache(root) is walks[0]
+    # Ten files written, the size is tracked without walking the directory again
+    assert walks[0]._size == sum(path.stat().st_size for path in (tmp_path / "cache").rglob("*") if path.is_file())
@@ -0,0 +1,139 @@
+import pytest
+import requests
+
+import jao_client
+from fake_jao import FakeJao
+
+FROM_UTC = "2025-02-20T00:00:00.000Z"
+TO_UTC = "2025-02-20T01:00:00.000Z"
+
+
+@pytest.fixture(autouse=True)
+def fresh_session(monkeypatch):
+    # Retry without backoff and build the pooled session with these settings
+    monkeypatch.setattr(jao_client, "RETRY_BACKOFF", 0)
+    monkeypatch.setattr(jao_client, "_session", None)
+
+
+def endpoint(fake):
+    return f"{fake.url}/IDCCB_finalComputation"
+
+
+@pytest.mark.parametrize("n_cnec, take, requests_made", [(250, 100, 3), (200, 100, 2), (99, 100, 1), (0, 100, 1)])
+def test_fetch_pages_reads_every_page(n_cnec, take, requests_made):
+    with FakeJao(n_cnec=n_cnec) as fake:
+        data = jao_client.fetch_pages(endpoint(fake), FROM_UTC, TO_UTC, take=take)
+        assert [record["id"] for record in data["data"]] == list(range(n_cnec))
+        # totalRowsWithFilter stops the paging on an exact multiple of Take
+        assert fake.requests == requests_made
+
+
+def test_paging_follows_the_total_past_capped_pages():
+    # The server returns at most 60 rows per page whatever Take asks for
+    with FakeJao(n_cnec=250, max_take=60) as fake:
+        data = jao_client.fetch_pages(endpoint(fake), FROM_UTC, TO_UTC, take=100)
+        assert [record["id"] for record in data["data"]] == list(range(250))
+        assert fake.requests == 5
+
+        ram, _ = jao_client.stream_cnec_arrays(endpoint(fake), FROM_UTC, TO_UTC, ["AT", "DE"], take=100)
+        assert len(ram) == 250
+
+        _, validators = jao_client.fetch_if_changed(endpoint(fake), FROM_UTC, TO_UTC, take=100)
+        assert len(validators["pages"]) == 5
+        fake.records("IDCCB_finalComputation", FROM_UTC, TO_UTC)[130]["ram"] = -1.0
+        data, _ = jao_client.fetch_if_changed(endpoint(fake), FROM_UTC, TO_UTC, validators, take=100)
+        # Pages answered 304 are fetched again from the Skip they were first read at
+        assert [record["id"] for record in data["data"]] == list(range(250))
+        assert data["data"][130]["ram"] == -1.0
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_fetch_pages_retries_transient_errors(status):
+    with FakeJao(n_cnec=50, failures=2, failure_status=status) as fake:
+        data = jao_client.fetch_pages(endpoint(fake), FROM_UTC, TO_UTC)
+        assert len(data["data"]) == 50
+        assert fake.requests == 3
+
+
+def test_fetch_pages_gives_up_after_retry_total():
+    with FakeJao(n_cnec=50, failures=jao_client.RETRY_TOTAL + 1) as fake:
+        with pytest.raises(requests.exceptions.RequestException):
+            jao_client.fetch_pages(endpoint(fake), FROM_UTC, TO_UTC)
+        assert fake.requests == jao_client.RETRY_TOTAL + 1
+
+
+def test_fetch_range_maps_failed_windows_to_none():
+    with FakeJao(n_cnec=30, failures=jao_client.RETRY_TOTAL + 1) as fake:
+        # One worker, so every failure hits the first window
+        results = jao_client.fetch_range(endpoint(fake), FROM_UTC, "2025-02-20T03:00:00.000Z", max_workers=1)
+        assert list(results) == ["2025-02-20T00:00:00.000Z", "2025-02-20T01:00:00.000Z", "2025-02-20T02:00:00.000Z"]
+        assert results["2025-02-20T00:00:00.000Z"] is None
+        assert len(results["2025-02-20T01:00:00.000Z"]["data"]) == 30
+        assert results["2025-02-20T02:00:00.000Z"]["data"][0]["dateTimeUtc"] == "2025-02-20T02:00:00.000Z"
+
+
+def test_stream_cnec_arrays_matches_fetch_pages():
+    with FakeJao(n_cnec=250) as fake:
+        records = jao_client.fetch_pages(endpoint(fake), FROM_UTC, TO_UTC, take=100)["data"]
+        ram, ptdf = jao_client.stream_cnec_arrays(endpoint(fake), FROM_UTC, TO_UTC, ["AT", "DE"], take=100)
+        assert ram.tolist() == [record["ram"] for record in records]
+        assert ptdf.tolist() == [[record["ptdf_AT"], record["ptdf_DE"]] for record in records]
+
+
+def test_stream_matches_processing_with_missing_ptdfs():
+    import main
+
+    with FakeJao(n_cnec=120) as fake:
+        records = fake.records("IDCCB_finalComputation", FROM_UTC, TO_UTC)
+        del records[3]["ptdf_AT"]
+        records[7]["ptdf_DE"] = None
+        streamed_ram, streamed_ptdf = jao_client.stream_cnec_arrays(endpoint(fake), FROM_UTC, TO_UTC,
+                                                                    main.topology.ZONES, take=50)
+        data = jao_client.fetch_pages(endpoint(fake), FROM_UTC, TO_UTC, take=50)
+
+    ram, ptdf = main.build_atc_inputs(main.process_cnec_data(data))
+    streamed_ptdf = main.topology.border_ptdf(streamed_ptdf)
+    assert streamed_ram.tolist() == ram
+    assert abs(streamed_ptdf - ptdf).max() < 1e-12
+    assert streamed_ptdf[3, main.topology.BORDER_INDEX["atcz"]] == 0
+    assert main.solve_atc_inputs(streamed_ram, streamed_ptdf, "numpy") == main.solve_atc_inputs(ram, ptdf, "numpy")
+
+
+def test_fetch_if_changed_uses_etags():
+    with FakeJao(n_cnec=250) as fake:
+        data, validators = jao_client.fetch_if_changed(endpoint(fake), FROM_UTC, TO_UTC, take=100)
+        assert len(data["data"]) == 250
+        assert all(page["etag"] for page in validators["pages"])
+
+        fake.requests = 0
+        data, validators = jao_client.fetch_if_changed(endpoint(fake), FROM_UTC, TO_UTC, validators, take=100)
+        assert data is None
+        assert fake.requests == fake.not_modified == 3
+
+
+def test_fetch_if_changed_downloads_unchanged_pages_again():
+    with FakeJao(n_cnec=250) as fake:
+        _, validators = jao_client.fetch_if_changed(endpoint(fake), FROM_UTC, TO_UTC, take=100)
+        fake.records("IDCCB_finalComputation", FROM_UTC, TO_UTC)[150]["ram"] = -1.0
+
+        fake.requests = fake.not_modified = 0
+        data, validators = jao_client.fetch_if_changed(endpoint(fake), FROM_UTC, TO_UTC, validators, take=100)
+        assert [record["id"] for record in data["data"]] == list(range(250))
+        assert data["data"][150]["ram"] == -1.0
+        # Pages 1 and 3 answered 304 and are fetched again unconditionally
+        assert fake.not_modified == 2
+        assert fake.requests == 5
+
+
+def test_fetch_if_changed_hashes_bodies_without_etags():
+    with FakeJao(n_cnec=250, etags=False) as fake:
+        _, validators = jao_client.fetch_if_changed(endpoint(fake), FROM_UTC, TO_UTC, take=100)
+        assert validators["pages"][0]["etag"] is None
+
+        data, validators = jao_client.fetch_if_changed(endpoint(fake), FROM_UTC, TO_UTC, validators, take=100)
+        assert data is None
+
+        fake.records("IDCCB_finalComputation", FROM_UTC, TO_UTC)[0]["contName"] = "CO 1"
+        data, _ = jao_client.fetch_if_changed(endpoint(fake), FROM_UTC, TO_UTC, validators, take=100)
+        assert data["data"][0]["contName"] == "CO 1"
+        assert fake.not_modified == 0
@@ -0,0 +1,105 @@
+import asyncio
+import datetime
+
+import pytest
+
+import jao_client
+from fake_jao import FakeJao
+from service import AtcService
+from topology import BORDERS
+
+NOW = datetime.datetime(2025, 2, 20, 10, 17, tzinfo=datetime.timezone.utc)
+MTU = "2025-02-20T11:00:00.000Z"
+
+
+@pytest.fixture(autouse=True)
+def fresh_session(monkeypatch):
+    monkeypatch.setattr(jao_client, "_session", None)
+
+
+def test_poll_solves_only_changed_mtus():
+    with FakeJao(n_cnec=300) as fake:
+        service = AtcService(f"{fake.url}/IDCCB_finalComputation", past_hours=1, future_hours=3,
+                             clock=lambda: NOW, poll=True)
+        assert asyncio.run(service.refresh()) == 4
+        assert asyncio.run(service.refresh()) == 0
+
+        records = fake.records("IDCCB_finalComputation", MTU, "2025-02-20T12:00:00.000Z")
+        # Not an input of the solver: new payload, same fingerprint
+        records[3]["contName"] = "renamed"
+        assert asyncio.run(service.refresh()) == 0
+
+        atc = service.store.mtus[MTU]["atc"]
+        records[3]["ram"] = -5000.0
+        assert asyncio.run(service.refresh()) == 1
+        assert service.store.mtus[MTU]["atc"] != atc
+
+
+def test_poll_reuses_atcs_only_when_they_equal_a_cold_solve():
+    import main
+
+    with FakeJao(n_cnec=300) as fake:
+        service = AtcService(f"{fake.url}/IDCCB_finalComputation", past_hours=0, future_hours=2,
+                             clock=lambda: NOW, poll=True)
+        records = fake.records("IDCCB_finalComputation", MTU, "2025-02-20T12:00:00.000Z")
+        # Negative RAMs would hold every ATC at zero
+        for record in records:
+            record["ram"] = abs(record["ram"])
+        asyncio.run(service.refresh())
+        state = service.store.mtus[MTU]["state"]
+        slack = next(i for i in range(len(records)) if not state.limited[i] and (state.ptdf[i] > 0).any())
+        limiting = next(i for i in range(len(records)) if state.limited[i])
+
+        # More RAM on a CNEC that never limited a border: the ATCs are kept
+        records[slack]["ram"] += 100
+        assert asyncio.run(service.refresh()) == 1
+        entry = service.store.mtus[MTU]
+        assert entry["state"].iterations == 0
+        assert entry["atc"] == pytest.approx(main.solve_atc_inputs(entry["ram"], entry["ptdf"], "numpy"))
+
+        # Less RAM on a limiting CNEC: solved from zero
+        records[limiting]["ram"] /= 2
+        assert asyncio.run(service.refresh()) == 1
+        entry = service.store.mtus[MTU]
+        assert entry["state"].iterations > 0
+        assert entry["atc"] == pytest.approx(main.solve_atc_inputs(entry["ram"], entry["ptdf"], "numpy"))
+
+
+def test_refresh_survives_a_bad_mtu():
+    with FakeJao(n_cnec=50) as fake:
+        fake.records("IDCCB_finalComputation", MTU, "2025-02-20T12:00:00.000Z")[0]["ram"] = "not a number"
+        service = AtcService(f"{fake.url}/IDCCB_finalComputation", past_hours=1, future_hours=3, clock=lambda: NOW)
+        assert asyncio.run(service.refresh()) == 3
+        assert MTU not in service.store
+        assert len(service.store.mtus) == 3
+
+
+def test_answer_queries_the_store():
+    service = AtcService("http://unused", past_hours=1, future_hours=3, clock=lambda: NOW)
+    atc = [float(j) for j in range(len(BORDERS))]
+    for hour in (10, 11, 13):
+        service.store.put(f"2025-02-20T{hour}:00:00.000Z", None, None, atc)
+    column = BORDERS.index("defr")
+
+    status, body = service.answer("/atc?border=DE-FR&hours=4")
+    assert status == 200
+    assert body == {"border": "defr", "atc": [
+        {"mtu_utc": f"2025-02-20T{hour}:00:00.000Z", "atc_mw": float(column)} for hour in (10, 11, 13)
+    ]}
+    status, body = service.answer("/atc?border=defr&from=2025-02-20T11:00:00.000Z")
+    assert [row["mtu_utc"] for row in body["atc"]] == ["2025-02-20T11:00:00.000Z"]
+    assert service.answer("/mtus") == (200, sorted(service.store.mtus))
+    assert service.answer("/health")[1]["mtus"] == 3
+
+
+@pytest.mark.parametrize("path, status", [
+    ("/atc?border=XX-YY", 400),
+    ("/atc", 400),
+    ("/atc?border=defr&hours=abc", 400),
+    ("/atc?border=defr&hours=0", 400),
+    ("/atc?border=defr&hours=1000000000", 400),
+    ("/nothing", 404),
+])
+def test_answer_rejects_bad_queries(path, status):
+    service = AtcService("http://unused", past_hours=1, future_hours=3, clock=lambda: NOW)
+    assert service.answer(path)[0] == status
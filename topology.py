@@ -0,0 +1,127 @@
+import functools
+import json
+import os
+
+# Define constants and configurations
+TOPOLOGY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topology.json")
+DEFAULT_REGION = "core"
+
+
+def build_incidence(zones, border_pairs):
+    """Build the (n_zone, n_border) matrix with +1 at the source and -1 at the target zone."""
+    import numpy as np
+
+    zone_index = {zone: i for i, zone in enumerate(zones)}
+    incidence = np.zeros((len(zones), len(border_pairs)))
+    for j, (source, target) in enumerate(border_pairs):
+        incidence[zone_index[source], j] = 1
+        incidence[zone_index[target], j] = -1
+    return incidence
+
+
+class Region:
+    """Zones, oriented borders and incidence matrix of one capacity calculation region.
+
+    Everything is derived once from the border mapping, so CNEC processing
+    only does array lookups. Border names are the lower-case source and
+    target zones, e.g. "atcz" for AT -> CZ, in mapping order. Both directions
+    of a physical border share one zone-to-zone PTDF up to the sign, see
+    forward and backward. The incidence matrix is built on
+    first use so reading the topology does not import numpy.
+    """
+
+    def __init__(self, name, border_mapping, endpoint=None, virtual_hubs=None):
+        self.name = name
+        self.endpoint = endpoint
+        self.border_mapping = {zone: list(targets) for zone, targets in border_mapping.items()}
+        for zone, hubs in (virtual_hubs or {}).items():
+            self.border_mapping.setdefault(zone, []).extend(hubs)
+
+        self.zones = list(self.border_mapping)
+        for targets in self.border_mapping.values():
+            self.zones.extend(target for target in targets if target not in self.zones)
+        self.ptdf_keys = {zone: f"ptdf_{zone}" for zone in self.zones}
+
+        self.border_pairs = [(source, target) for source, targets in self.border_mapping.items() for target in targets]
+        self.borders = [f"{source.lower()}{target.lower()}" for source, target in self.border_pairs]
+        self.border_index = {border: j for j, border in enumerate(self.borders)}
+
+        # Physical borders in order of first appearance, with the oriented
+        # border index of each direction (-1 where the reverse is not listed)
+        pair_index = {pair: j for j, pair in enumerate(self.border_pairs)}
+        self.forward = []
+        self.backward = []
+        for j, (source, target) in enumerate(self.border_pairs):
+            reverse = pair_index.get((target, source), -1)
+            if reverse == -1 or reverse > j:
+                self.forward.append(j)
+                self.backward.append(reverse)
+
+    @functools.cached_property
+    def incidence(self):
+        return build_incidence(self.zones, self.border_pairs)
+
+    def border_ptdf(self, zonal_ptdf):
+        """Turn (n_cnec, n_zone) zone-to-slack PTDFs into (n_cnec, n_border) zone-to-zone PTDFs.
+
+        A NaN zone PTDF marks a zone missing from the record. Borders
+        touching it get a PTDF of 0, as when process_cnec_data skips them.
+        """
+        import numpy as np
+
+        zonal_ptdf = np.asarray(zonal_ptdf, dtype=np.float64)
+        missing = np.isnan(zonal_ptdf)
+        if not missing.any():
+            return zonal_ptdf @ self.incidence
+        ptdf = np.where(missing, 0, zonal_ptdf) @ self.incidence
+        ptdf[(missing @ np.abs(self.incidence)) > 0] = 0
+        return ptdf
+
+
+@functools.lru_cache(maxsize=None)
+def load_regions(path=TOPOLOGY_FILE):
+    """Read every region of a topology file, compiled once per path."""
+    with open(path) as file:
+        config = json.load(file)
+    regions = {}
+    for name, region in config.items():
+        hubs = region.get("virtual_hubs", {})
+        regions[name] = Region(
+            name,
+            region["border_mapping"],
+            region.get("endpoint"),
+            hubs.get("border_mapping") if hubs.get("enabled") else None,
+        )
+    return regions
+
+
+def get_region(name=DEFAULT_REGION, path=TOPOLOGY_FILE):
+    """Return the compiled region called name."""
+    regions = load_regions(path)
+    if name not in regions:
+        raise ValueError(f"Unknown region: {name}, expected one of {sorted(regions)}")
+    return regions[name]
+
+
+# Core bidding zones and their neighbours
+CORE = get_region(DEFAULT_REGION)
+BORDER_MAPPING = CORE.border_mapping
+ZONES = CORE.zones
+PTDF_KEYS = CORE.ptdf_keys
+
+# Canonical oriented border order, e.g. "atcz" for AT -> CZ
+BORDER_PAIRS = CORE.border_pairs
+BORDERS = CORE.borders
+BORDER_INDEX = CORE.border_index
+
+
+def __getattr__(name):
+    # INCIDENCE is built on first access, see Region.incidence
+    if name == "INCIDENCE":
+        return CORE.incidence
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def border_ptdf(zonal_ptdf):
+    """Turn (n_cnec, n_zone) zone-to-slack PTDFs into (n_cnec, n_border) zone-to-zone PTDFs."""
+    return CORE.border_ptdf(zonal_ptdf)